@@ -5,7 +5,6 @@ import argparse
 import textwrap
 import logging
 import os
-import time
 import threading
 from riscv import core, util, memory, hilo
 from typing import List
@@ -53,7 +52,9 @@ def main():
         except ValueError:
             print('Por favor escriba un número entero')
 
-    return run_tmain(programas, quantum)
+    replacement = memory.RP_LRU if args.lru else memory.RP_FIFO
+
+    return run_tmain(programas, quantum, replacement)
 
 
 def make_parser():
@@ -87,10 +88,13 @@ def make_parser():
     verbosity_help_es = 'aumenta el nivel de verbosidad, se puede incluir hasta 2 veces para imprimir más información' \
                         ' de la ejecución en pantalla (-v ó -vv)'
 
+    lru_help_es = 'usa reemplazo LRU en los cachés asociativos en lugar de FIFO'
+
     parser = argparse.ArgumentParser(description=description_es, epilog=epilog_es,
                                      formatter_class=argparse.RawDescriptionHelpFormatter)
 
     parser.add_argument('--verbose', '-v', action='count', help=verbosity_help_es, default=0)
+    parser.add_argument('--lru', action='store_true', help=lru_help_es)
 
     meg = parser.add_mutually_exclusive_group(required=True)
     meg.add_argument('-f', '--files', type=str, metavar=file_meta_es, nargs='+', help=file_help_es)
@@ -99,21 +103,30 @@ def make_parser():
     return parser
 
 
-def setup_modules(global_vars):
+def setup_modules(global_vars, replacement=memory.RP_FIFO):
     """
     Crea todos los componentes de hardware y los conecta entre sí
 
     :param global_vars: Objeto con los globales (barrera para sincronización, scheduler)
+    :param replacement: Política de reemplazo de los cachés
     :return:            Todos los componentes de harwdare inicializados
     """
-    mem_data = memory.RamMemory('Memoria de datos', start_addr=0, end_addr=384, num_blocks=24, bpp=4, ppb=4)
-    mem_inst = memory.RamMemory('Memoria de instrucciones', start_addr=384, end_addr=1024, num_blocks=40, bpp=4, ppb=4)
+    # Ambas memorias comparten un solo buffer de 256 palabras (direcciones 0 a 1024)
+    arena = memory.make_arena(256)
+    mem_data = memory.RamMemory('Memoria de datos', start_addr=0, end_addr=384, num_blocks=24, bpp=4, ppb=4,
+                                words=arena[0:96])
+    mem_inst = memory.RamMemory('Memoria de instrucciones', start_addr=384, end_addr=1024, num_blocks=40, bpp=4, ppb=4,
+                                words=arena[96:256])
     core0 = core.Core('CPU0', global_vars)
-    cache_inst0 = memory.CacheMemAssoc('Inst$0', start_addr=384, end_addr=1024, assoc=1, num_blocks=8, bpp=4, ppb=4)
-    cache_data0 = memory.CacheMemAssoc('Data$0', start_addr=0, end_addr=384, assoc=4, num_blocks=8, bpp=4, ppb=4)
+    cache_inst0 = memory.CacheMemAssoc('Inst$0', start_addr=384, end_addr=1024, assoc=1, num_blocks=8, bpp=4, ppb=4,
+                                       replacement=replacement)
+    cache_data0 = memory.CacheMemAssoc('Data$0', start_addr=0, end_addr=384, assoc=4, num_blocks=8, bpp=4, ppb=4,
+                                       replacement=replacement)
     core1 = core.Core('CPU1', global_vars)
-    cache_inst1 = memory.CacheMemAssoc('Inst$1', start_addr=384, end_addr=1024, assoc=1, num_blocks=8, bpp=4, ppb=4)
-    cache_data1 = memory.CacheMemAssoc('Data$1', start_addr=0, end_addr=384, assoc=1, num_blocks=8, bpp=4, ppb=4)
+    cache_inst1 = memory.CacheMemAssoc('Inst$1', start_addr=384, end_addr=1024, assoc=1, num_blocks=8, bpp=4, ppb=4,
+                                       replacement=replacement)
+    cache_data1 = memory.CacheMemAssoc('Data$1', start_addr=0, end_addr=384, assoc=1, num_blocks=8, bpp=4, ppb=4,
+                                       replacement=replacement)
 
     core0.inst_cache = cache_inst0
     core0.data_cache = cache_data0
@@ -138,32 +151,33 @@ def run_tcpu(cpu):
     :param cpu: El core
     :return:
     """
-    print('Iniciando ejecución de {:s}'.format(cpu.name))
-    logging.info('Running Core {:s}'.format(cpu.name))
+    name = cpu.name
+    print('Iniciando ejecución de {:s}'.format(name))
+    logging.info('Running Core %s', name)
     cpu.run()
 
-    logging.info('Iddling Core {:s}'.format(cpu.name))
+    logging.info('Iddling Core %s', name)
 
-    while not cpu._global_vars.done:
-        cpu.iddle()
+    cpu.iddle()
 
-    logging.info('Finalizing Core {:s}'.format(cpu.name))
-    print('Finalizando ejecución de {:s}'.format(cpu.name))
+    logging.info('Finalizing Core %s', name)
+    print('Finalizando ejecución de {:s}'.format(name))
     return
 
 
-def run_tmain(programs: List[str], quantum: int):
+def run_tmain(programs: List[str], quantum: int, replacement: str = memory.RP_FIFO):
     """
     Corre el hilo principal de la simulación
 
     :param programs:    Lista de archivos con los hilillos
     :param quantum:     Tamaño del quantum
+    :param replacement: Política de reemplazo de los cachés
     :return:
     """
 
     hilo.Scheduler.INIT_QUANTUM = quantum
-    global_vars = util.GlobalVars(3)
-    core0, cache_inst0, cache_data0, core1, cache_inst1, cache_data1, mem_inst, bus_inst, mem_data, bus_data = setup_modules(global_vars)
+    global_vars = util.GlobalVars(2)
+    core0, cache_inst0, cache_data0, core1, cache_inst1, cache_data1, mem_inst, bus_inst, mem_data, bus_data = setup_modules(global_vars, replacement)
     mem_inst.data_format = 'default'
     print(global_vars.scheduler.INIT_QUANTUM)
 
@@ -179,40 +193,24 @@ def run_tmain(programs: List[str], quantum: int):
     t_cpu0.start()
     t_cpu1.start()
 
-    logging.info('Thread {} spawned children'.format(threading.current_thread().getName()))
-
-    iter = 0
-
-    while not global_vars.done:
-        while global_vars.clock_barrier.n_waiting < 2:
-            time.sleep(0.001)
-
-        # logging.debug("Ambos hilos llegaron a clock")
+    logging.info('Thread %s spawned children', threading.current_thread().name)
 
-        for c in [core0, core1]:
-            if c.state == core.Core.IDL:
-                logging.debug('{:s} ya terminó'.format(c.name))
+    # El hilo principal no participa en la barrera de los relojes, solo muestra el avance (un punto cada 200 ciclos)
+    # hasta que el último core en terminar marca el fin de la simulación
+    dots = 0
+    while not global_vars.done_event.wait(0.05):
+        cycles = global_vars.clock_barrier.generation
+        print('.' * (cycles // 200 - dots), end='', flush=True)
+        dots = cycles // 200
 
-        if core0.state == core.Core.IDL and core1.state == core.Core.IDL:
-            logging.info('Ambos Cores terminaron, finalizando simulación')
-            global_vars.done = True
-
-        iter += 1
-        if (iter % 200) == 0:
-            print('.', end='', flush=True)
-
-        global_vars.clock_barrier.wait()
-
-    print('')
+    print('.' * (global_vars.clock_barrier.generation // 200 - dots))
 
     t_cpu0.join()
     t_cpu1.join()
 
     print('\nFinalizando simulación, a continuación se presenta el estado final\n\n')
 
-    hilillos = []
-    for i in range(len(programs)):
-        hilillos.append(global_vars.scheduler.finished_queue.get_nowait())
+    hilillos = util.drain_queue(global_vars.scheduler.finished_queue)
 
     print('--------------- Hilillos ---------------\n')
 
@@ -1,60 +1,52 @@
-import threading
 import logging
-from queue import Empty
-from typing import List, Optional
+from array import array
+from collections import defaultdict
+from typing import Optional
 
 from .util import GlobalVars
-from .isa import OpCodes, decode as isa_decode
-from .hilo import Pcb
-
-
-PC_ADDRESS = 32
-LR_ADDRESS = 33
-
-OP_ARITH_REG = (OpCodes.OP_ADD, OpCodes.OP_SUB, OpCodes.OP_MUL, OpCodes.OP_DIV)
-OP_LOAD_STORE = (OpCodes.OP_LW, OpCodes.OP_SW)
-OP_LR_SC = (OpCodes.OP_LR, OpCodes.OP_SC)
-OP_BRANCH = (OpCodes.OP_BEQ, OpCodes.OP_BNE)
-OP_ROUTINE = (OpCodes.OP_JAL, OpCodes.OP_JALR)
-
-
-class Register(object):
-    """Clase que modela un registro del CPU"""
-
-    address: int
-    reg_type: str
-    zero_reg: bool
-    __data: int
-
-    def __init__(self, address: int, reg_type: str, zero_reg: bool = False):
-        self.address = address
-        self.reg_type = reg_type
-        self.zero_reg = zero_reg
-        self.__data = 0
-
-    @property
-    def data(self):
-        if self.zero_reg:
-            return 0
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, var: int):
-        """ Set the register's value
-        :type var: int
-        """
-        if self.zero_reg:
-            raise Exception('Trying to set Zero Register value')
-        else:
-            self.__data = var
+from .isa import OpCodes, OPCODE_MAP, M_OPCD, decode as isa_decode
+from .hilo import Pcb, format_registers
+
+
+# Formatos de operandos: para rd, rf1, rf2 e inm indica cuál argumento de la instrucción (0, 1 o 2) le corresponde,
+# o None si la operación no lo usa
+FMT_NONE = (None, None, None, None)
+FMT_REG = (0, 1, 2, None)
+FMT_INM = (0, 1, None, 2)
+FMT_SB = (None, 0, 1, 2)
+FMT_LR = (0, 1, None, None)
+FMT_SC = (1, 0, 1, None)
+
+OPERAND_FORMAT = [FMT_NONE] * (M_OPCD + 1)
+OPERAND_FORMAT[OpCodes.OP_ADD.value] = FMT_REG
+OPERAND_FORMAT[OpCodes.OP_SUB.value] = FMT_REG
+OPERAND_FORMAT[OpCodes.OP_MUL.value] = FMT_REG
+OPERAND_FORMAT[OpCodes.OP_DIV.value] = FMT_REG
+OPERAND_FORMAT[OpCodes.OP_ADDI.value] = FMT_INM
+OPERAND_FORMAT[OpCodes.OP_LW.value] = FMT_INM
+OPERAND_FORMAT[OpCodes.OP_JAL.value] = FMT_INM
+OPERAND_FORMAT[OpCodes.OP_JALR.value] = FMT_INM
+OPERAND_FORMAT[OpCodes.OP_SW.value] = FMT_SB
+OPERAND_FORMAT[OpCodes.OP_BEQ.value] = FMT_SB
+OPERAND_FORMAT[OpCodes.OP_BNE.value] = FMT_SB
+OPERAND_FORMAT[OpCodes.OP_LR.value] = FMT_LR
+OPERAND_FORMAT[OpCodes.OP_SC.value] = FMT_SC
+"""Tabla de decodificación de operandos indexada por el byte de código de operación de la instrucción"""
+
+OP_BRANCH = frozenset({OpCodes.OP_BEQ.value, OpCodes.OP_BNE.value})
+"""Códigos de operación de los saltos condicionales"""
 
 
 class Core(object):
     r"""Clase que modela el núcleo"""
-    __lr: Register
-    __lr_lock: threading.RLock
-    __pcb: Optional[Pcb]
+
+    __slots__ = ('name', 'clock', 'pcb_start_clock', 'registers', 'pc', '_global_vars', '_pcb', '_lr', 'data_cache',
+                 'inst_cache', 'state', 'log', '_hits', '_misses', '_dispatch', '_decoded',
+                 '_step_fn')
+
+    pc: int
+    _lr: int
+    _pcb: Optional[Pcb]
     _global_vars: GlobalVars
 
     RUN = 0
@@ -67,82 +59,167 @@ class Core(object):
         self.clock = 0
         self.pcb_start_clock = 0
 
-        self.registers = [Register(i, 'General purpose', i == 0) for i in range(32)]
-        self.pc = Register(PC_ADDRESS, 'PC')
+        self.registers = array('q', bytes(8*32))
+        """Registros de propósito general, r0 se vuelve a poner en cero luego de cada instrucción"""
+        self.pc = 0
+        """Contador de programa"""
 
         self._global_vars = global_vars
-        self.__pcb = None
+        self._pcb = None
 
-        self.__lr = Register(LR_ADDRESS, 'LR')
-        self.__lr.data = -1
-        self.__lr_lock = threading.RLock()
+        self._lr = -1
+        """Dirección reservada por LR (-1 si no hay reserva). Solo la lee y escribe el hilo de este núcleo, la
+        invalidación entre núcleos se hace con la reserva del caché (``lr_dir``) bajo el lock del caché"""
 
         self.data_cache = None
         self.inst_cache = None
         self.state = self.RUN
-        self.log = {}
+        self.log = defaultdict(int)
+        """Cantidad de veces que ha corrido cada hilillo, por PID"""
         self._hits = 0
         self._misses = 0
 
+        dispatch = [self._op_noop] * (M_OPCD + 1)
+        dispatch[OpCodes.OP_ADD.value] = self._op_add
+        dispatch[OpCodes.OP_SUB.value] = self._op_sub
+        dispatch[OpCodes.OP_MUL.value] = self._op_mul
+        dispatch[OpCodes.OP_DIV.value] = self._op_div
+        dispatch[OpCodes.OP_ADDI.value] = self._op_addi
+        dispatch[OpCodes.OP_LW.value] = self._op_lw
+        dispatch[OpCodes.OP_SW.value] = self._op_sw
+        dispatch[OpCodes.OP_LR.value] = self._op_lr
+        dispatch[OpCodes.OP_SC.value] = self._op_sc
+        dispatch[OpCodes.OP_BEQ.value] = self._op_beq
+        dispatch[OpCodes.OP_BNE.value] = self._op_bne
+        dispatch[OpCodes.OP_JAL.value] = self._op_jal
+        dispatch[OpCodes.OP_JALR.value] = self._op_jalr
+        dispatch[OpCodes.OP_FIN_HEX.value] = self._op_fin
+
+        self._dispatch = dispatch
+        """Rutina que ejecuta cada código de operación, indexada por el byte de código de operación de la
+        instrucción codificada (FIN se guarda como OP_FIN_HEX). Los códigos sin rutina ejecutan NOOP"""
+
+        self._decoded = []
+        """Instrucciones decodificadas indexadas por número de palabra (pc >> 2): (instrucción, op_code, rutina, rd,
+        rf1, rf2, inm). Crece según se van ejecutando direcciones más altas"""
+
+        self._step_fn = None
+        """Función de ``step()``, se construye con ``_make_step()`` en el primer paso y se descarta en cada cambio de
+        contexto"""
+
     def run(self):
         """
-        Corre el núcleo hasta que no haya hilillos pendientes de ejecución. Si el quanto es mayor que 0 manda a ejecutar
-        la siguiente instrucción, si no hace cambio de contexto del hilillo.
+        Corre el núcleo hasta que no haya hilillos pendientes de ejecución. Ejecuta instrucciones del hilillo actual
+        mientras su quantum sea mayor que 0 y luego hace cambio de contexto.
 
         :return:
         """
 
         # Obtener primer PCB
         self._pcb_in()
-        assert self.__pcb is not None
+        assert self._pcb is not None
+
+        step = self._make_step()
 
         while self.state == self.RUN:
-            if self.__pcb.quantum > 0:
-                self.step()
-            else:
-                self._context_switch()
+            pcb = self._pcb
+            while pcb.quantum > 0:
+                step()
+
+            self._context_switch()
 
     def step(self):
         """
-        Ejecuta la siguiente instrucción. Decrementa en uno el quantum o lo pone en cero si la instrucción era FIN
+        Ejecuta la siguiente instrucción. Decrementa en uno el quantum o lo pone en cero si la instrucción era FIN.
 
         :return:
         """
+        if self._step_fn is None:
+            self._step_fn = self._make_step()
+        self._step_fn()
 
-        ins = self._fetch()
-        op_code, rd, rf1, rf2, inm = self._decode(ins)
-        xd, memd, jmp, jmp_target = self._execute(op_code, rf1, rf2, inm)
-        xd = self._memory(op_code, memd, rf2, xd)
-        self._write_back(op_code, rd, xd, jmp, jmp_target)
-
-        if op_code == OpCodes.OP_FIN:
-            self.__pcb.status = Pcb.FINISHED
-            self.__pcb.quantum = 0
-        else:
-            self.__pcb.quantum -= 1
+    def _make_step(self):
+        """
+        Construye la función que ejecuta una instrucción, la usan ``run()`` y ``step()``. Las referencias del ciclo
+        (caché de instrucciones, registros, tabla de decodificación, barrera) quedan en variables locales de la
+        clausura. El nivel de logging se consulta una sola vez, de modo que con INFO apagado el ciclo no llama a
+        logging.
 
-        self.clock_tick()
+        La instrucción siempre se obtiene del caché de instrucciones (sus fallos son parte de la simulación), pero la
+        decodificación se guarda en ``_decoded`` por número de palabra, de modo que en los ciclos siguientes solo se
+        llama la rutina de la operación. La entrada se vuelve a decodificar si la palabra en esa dirección cambió.
 
-    def clock_tick(self):
+        :return:    La función sin argumentos que ejecuta la siguiente instrucción
         """
-        Avanza en uno el reloj. Sincroniza con la barrera global.
+        inst_load = self.inst_cache.load
+        regs = self.registers
+        decoded = self._decoded
+        decode = self._decode
+        barrier_wait = self._global_vars.clock_barrier.wait
+        info = logging.info
+        info_on = logging.getLogger().isEnabledFor(logging.INFO)
+
+        def step():
+            # Fetch
+            pc = self.pc
+            ins, hit = inst_load(pc)
+            if not hit and info_on:
+                info('Miss de instrucción @(0x%04X)', pc)
+            self.pc = pc + 4
+
+            # Decode
+            try:
+                entry = decoded[pc >> 2]
+            except IndexError:
+                decoded.extend([None] * ((pc >> 2) + 1 - len(decoded)))
+                entry = None
+
+            if entry is None or entry[0] != ins:
+                entry = decode(ins)
+                decoded[pc >> 2] = entry
+
+            _, op_code, handler, rd, rf1, rf2, inm = entry
+            if info_on:
+                info('Operación %s', op_code.name)
+
+            # Ejecución, acceso a memoria y writeback
+            self._pcb.quantum -= 1
+            handler(rd, rf1, rf2, inm)
+            regs[0] = 0
+
+            # Las penalidades de los cachés también avanzan el reloj, por eso no se guarda en una variable local
+            self.clock += 1
+            barrier_wait()
+
+        return step
+
+    def clock_tick(self, cycles: int = 1):
+        """
+        Avanza el reloj. Sincroniza con la barrera global una vez por ciclo, aunque si son varios ciclos el núcleo
+        solo se despierta al final del último.
 
+        :param cycles:  Cantidad de ciclos que avanza
         :return:
         """
         # logging.debug('Barrier id: {0:d}'.format(id(self.__global_vars.clock_barrier)))
         # logging.debug('%s waiting for clock sync', self.name)
-        self.clock += 1
-        self._global_vars.clock_barrier.wait()
+        self.clock += cycles
+        self._global_vars.clock_barrier.wait(cycles)
 
     def iddle(self):
         """
-        No hace nada, pero espera en la barrera. Este método se usa luego de que un procesador ya terminó, mientras
-        el otro está corriendo para que no bloquee infinitamente en la barrera que sincroniza los relojes.
+        Se usa luego de que el procesador ya terminó. Abandona la barrera que sincroniza los relojes, para que el otro
+        procesador no lo siga esperando, y se bloquea hasta que termine la simulación. El último procesador en
+        abandonar la barrera es el que termina la simulación.
 
         :return:
         """
-        logging.debug('%s waiting for clock sync', self.name)
-        self._global_vars.clock_barrier.wait()
+        logging.debug('%s leaving clock sync', self.name)
+        if self._global_vars.clock_barrier.leave() == 0:
+            logging.info('Todos los núcleos terminaron, finalizando simulación')
+            self._global_vars.done_event.set()
+
+        self._global_vars.done_event.wait()
 
     def _context_switch(self):
         """
@@ -150,11 +227,10 @@ class Core(object):
 
         :return:
         """
-        logging.debug('{:s} haciendo CONTEXT SWITCH'.format(self.name))
+        logging.debug('%s haciendo CONTEXT SWITCH', self.name)
 
-        self.__lr_lock.acquire()
-        self.__lr.data = -1
-        self.__lr_lock.release()
+        self._lr = -1
+        self._step_fn = None
 
         self._pcb_out()
         self._pcb_in()
@@ -167,25 +243,25 @@ class Core(object):
 
         :return:
         """
-        assert self.__pcb is not None
-        assert self.__pcb.quantum == 0
+        assert self._pcb is not None
+        assert self._pcb.quantum == 0
 
-        logging.info('El hilillo {:s} va de salida'.format(self.__pcb.name))
+        logging.info('El hilillo %s va de salida', self._pcb.name)
         pcb_ticks = self.clock - self.pcb_start_clock
-        self.__pcb.ticks += pcb_ticks
-        self.__pcb.pc = self.pc.data
-        assert len(self.__pcb.registers) == len(self.registers)
-        self.__pcb.registers[:] = [r.data for r in self.registers]
-
-        if self.__pcb.status == Pcb.FINISHED:
-            logging.info('El hillilo {:s} terminó de correr'.format(self.__pcb.name))
-            self._global_vars.scheduler.put_finished(self.__pcb)
+        self._pcb.ticks += pcb_ticks
+        self._pcb.pc = self.pc
+        assert len(self._pcb.registers) == len(self.registers)
+        self._pcb.registers[:] = self.registers
+
+        if self._pcb.status == Pcb.FINISHED:
+            logging.info('El hillilo %s terminó de correr', self._pcb.name)
+            self._global_vars.scheduler.put_finished(self._pcb)
         else:
-            assert self.__pcb.status == Pcb.RUNNING
-            self.__pcb.status = Pcb.READY
-            self._global_vars.scheduler.put_ready(self.__pcb)
+            assert self._pcb.status == Pcb.RUNNING
+            self._pcb.status = Pcb.READY
+            self._global_vars.scheduler.put_ready(self._pcb)
 
-        self.__pcb = None
+        self._pcb = None
 
     def _pcb_in(self):
         """
@@ -195,317 +271,191 @@ class Core(object):
         :return:
         """
 
-        assert self.__pcb is None
+        assert self._pcb is None
 
         try:
-            self.__pcb = self._global_vars.scheduler.next_ready_thread()
+            self._pcb = self._global_vars.scheduler.next_ready_thread()
             got_pcb = True
 
-        except Empty as e:
+        except IndexError as e:
             logging.debug('No se consiguio hilo' + str(e))
             got_pcb = False
 
         if got_pcb:
 
-            assert self.__pcb.status == Pcb.READY
-            self.__pcb.status = Pcb.RUNNING
+            assert self._pcb.status == Pcb.READY
+            self._pcb.status = Pcb.RUNNING
             self.pcb_start_clock = self.clock
 
             # Copiar el estado del procesador
-            self.pc.data = self.__pcb.pc
-            assert len(self.__pcb.registers) == len(self.registers)
-            for i in range(1, len(self.registers)):
-                self.registers[i].data = self.__pcb.registers[i]
+            self.pc = self._pcb.pc
+            assert len(self._pcb.registers) == len(self.registers)
+            self.registers[:] = self._pcb.registers
+            self.registers[0] = 0
 
             self.state = self.RUN
 
-            if self.__pcb.pid in self.log.keys():
-                self.log[self.__pcb.pid] += 1
-            else:
-                self.log[self.__pcb.pid] = 1
+            self.log[self._pcb.pid] += 1
 
-            logging.info('El hilillo {:s} viene entrando'.format(self.__pcb.name))
+            logging.info('El hilillo %s viene entrando', self._pcb.name)
 
         else:
             logging.info('No hay más hilillos pendientes de ejecución')
             self.state = self.IDL
 
-    def _fetch(self):
-        """
-        Etapa de fetch del pipeline, obtiene la instrucción y actualiza PC
-
-        :return:    La instucción codificada
-        """
-
-        ins, hit = self.inst_cache.load(self.pc.data)
-
-        if not hit:
-            logging.info('Miss de instrucción @(0x{:04X})'.format(self.pc.data))
-
-        self.pc.data = self.pc.data+4
-        return ins
-
     def _decode(self, instruction: int):
         """
-        Estapa de decode del pipeline, decodifica la instrucción en el código de operación y los argumentos
+        Estapa de decode del pipeline, decodifica la instrucción en el código de operación y los argumentos, y
+        selecciona la rutina que ejecuta la operación
 
         :param instruction:     La instucción codificada
-        :return:                Código de operación, registro destido, registros fuentes e inmediato, según sea el caso
+        :return:                La instrucción, código de operación, rutina de la operación, registro destido,
+                                registros fuentes e inmediato, según sea el caso
         """
-        op_code, arg1, arg2, arg3 = isa_decode(instruction)
-        op_code = OpCodes(op_code)
+        op_value, arg1, arg2, arg3 = isa_decode(instruction)
+        op_code = OPCODE_MAP[op_value]
 
-        rd = None
-        rf1 = None
-        rf2 = None
-        inm = None
+        args = (arg1, arg2, arg3)
+        rd, rf1, rf2, inm = [None if i is None else args[i] for i in OPERAND_FORMAT[instruction & M_OPCD]]
 
-        logging.info('Operación {:s}'.format(op_code.name))
+        # Los saltos condicionales tienen el desplazamiento en palabras, se guarda ya convertido a bytes
+        if op_value in OP_BRANCH:
+            inm *= 4
 
-        if op_code in OP_ARITH_REG:
-            rd = arg1
-            rf1 = arg2
-            rf2 = arg3
-            # logging.debug('Ejecutando -->  {:s} r{:02d}, r{:02d}, r{:02d}'.format(op_code.name, rd, rf1, rf2))
+        handler = self._dispatch[instruction & M_OPCD]
+        if handler == self._op_noop and op_code is not OpCodes.OP_NOOP:
+            logging.warning('Unknown OPCODE %s', op_code.name)
 
-        elif op_code in OP_BRANCH or op_code == OpCodes.OP_SW:
-            rf1 = arg1
-            rf2 = arg2
-            inm = arg3
+        return instruction, op_code, handler, rd, rf1, rf2, inm
 
-        elif op_code in OP_ROUTINE or op_code == OpCodes.OP_ADDI or op_code == OpCodes.OP_LW:
-            rd = arg1
-            rf1 = arg2
-            inm = arg3
+    # Rutinas de cada operación, hacen las etapas de ejecución, acceso a memoria y writeback. Todas reciben los
+    # argumentos ya decodificados (rd, rf1, rf2, inm) aunque no los usen. Pueden escribir en r0, run() y step() lo
+    # vuelven a poner en cero luego de cada instrucción.
 
-        elif op_code == OpCodes.OP_LR:
-            rd = arg1
-            rf1 = arg2
-
-        elif op_code == OpCodes.OP_SC:
-            rd = arg2
-            rf1 = arg1
-            rf2 = arg2
-
-        elif op_code == OpCodes.OP_FIN or op_code == OpCodes.OP_NOOP:
-            pass
-
-        else:
-            logging.warning('Unknown OPCODE {:s}'.format(op_code.name))
+    def _op_add(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        regs[rd] = regs[rf1] + regs[rf2]
 
-        return op_code, rd, rf1, rf2, inm
+    def _op_sub(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        regs[rd] = regs[rf1] - regs[rf2]
 
-    def _execute(self, op_code: OpCodes, rf1: int, rf2: int, inm: int):
-        """
-        Etapa de ejecución del pipeline, hace los cálculos de la operación, dirección de acceso a memoria o condición
-        del salto.
-
-        :param op_code:     Código de operación
-        :param rf1:         Registro fuente
-        :param rf2:         Registro fuente
-        :param inm:         Valor inmediato
-        :return:            Resultado de la operación, dirección de memoria, salto tomado y dirección de salto según sea
-                            el caso
-        """
+    def _op_mul(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        regs[rd] = regs[rf1] * regs[rf2]
 
-        # FIXME: xd y memd se pueden fusionar en una sola variable (alu_out)
-        xd = None
-        memd = None
-        jmp = None
-        jmp_target = None
-
-        if op_code in OP_ARITH_REG:
-            x2 = self.registers[rf1].data
-            x3 = self.registers[rf2].data
-            if op_code == OpCodes.OP_ADD:
-                xd = x2 + x3
-            elif op_code == OpCodes.OP_SUB:
-                xd = x2 - x3
-            elif op_code == OpCodes.OP_MUL:
-                xd = x2 * x3
-            elif op_code == OpCodes.OP_DIV:
-                xd = x2 // x3
-            else:
-                logging.error('Unexpected OPCODE {:s} in exec '.format(op_code.name))
-
-        elif op_code == OpCodes.OP_ADDI:
-            x2 = self.registers[rf1].data
-            n = inm
-            xd = x2 + n
-
-        elif op_code in OP_LOAD_STORE:
-            x1 = self.registers[rf1].data
-            n = inm
-            memd = x1 + n
-
-        elif op_code == OpCodes.OP_LR:
-            x1 = self.registers[rf1].data
-            self.__lr_lock.acquire()
-            self.__lr.data = x1
-            self.__lr_lock.release()
-            memd = x1
-
-        elif op_code == OpCodes.OP_SC:
-            x1 = self.registers[rf1].data
-            # x2 = self.registers[rf2].data
-            memd = x1
-
-        elif op_code in OP_BRANCH:
-            x1 = self.registers[rf1].data
-            x2 = self.registers[rf2].data
-            n = inm
-
-            if op_code == OpCodes.OP_BEQ:
-                jmp = x1 == x2
-            elif op_code == OpCodes.OP_BNE:
-                jmp = x1 != x2
-            else:
-                logging.error('Unexpected OPCODE {:s} in exec '.format(op_code.name))
+    def _op_div(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        regs[rd] = regs[rf1] // regs[rf2]
 
-            jmp_target = self.pc.data + 4*n
+    def _op_addi(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        regs[rd] = regs[rf1] + inm
 
-        elif op_code in OP_ROUTINE:
-            n = inm
-            jmp = True
+    def _op_lw(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        memd = regs[rf1] + inm
+        xd, hit = self.data_cache.load(memd)
+        if not hit:
+            logging.info('Miss de lectura @(0x%04X)', memd)
+            self._misses += 1
+        else:
+            self._hits += 1
 
-            if op_code == OpCodes.OP_JAL:
-                jmp_target = self.pc.data + n
-            elif op_code == OpCodes.OP_JALR:
-                x1 = self.registers[rf1].data
-                jmp_target = x1 + n
-            else:
-                logging.error('Unexpected OPCODE {:s} in exec '.format(op_code.name))
+        regs[rd] = xd
 
-            xd = self.pc.data
+    def _op_sw(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        memd = regs[rf1] + inm
+        word = regs[rf2]
+        hit = self.data_cache.store(memd, word)
+        if not hit:
+            logging.info('Miss de escritura @(0x%04X)', memd)
+            self._misses += 1
+        else:
+            self._hits += 1
 
-        assert type(xd) == int or xd is None
-        assert type(memd) == int or memd is None
-        assert type(jmp_target) == int or jmp_target is None
-        assert type(jmp) == bool or jmp is None
+    def _op_lr(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        memd = regs[rf1]
+        self._lr = memd
 
-        return xd, memd, jmp, jmp_target
+        xd, hit = self.data_cache.load_reserved(memd)
+        if not hit:
+            logging.info('Miss de lectura reservada @(0x%04X)', memd)
+            self._misses += 1
+        else:
+            self._hits += 1
 
-    def _memory(self, op_code: OpCodes, memd: int, rf2: int, xd: int):
-        """
-        Etapa de acceso a memoria del pipeline, se encarga de hacer load/store y lr/sc
+        regs[rd] = xd
 
-        :param op_code:     Código de operación
-        :param memd:        Dirección de memoria
-        :param rf2:         Registro fuente (contiene el dato para store)
-        :param xd:          Resultado de la ALU, lo sobre escribe con el dato obtenido en load si es el caso
-        :return:            Resultado de load o resultado de ALU si el OPCODE no era Load o LR
-        """
+    def _op_sc(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        memd = regs[rf1]
+        word = regs[rf2]
 
-        if op_code == OpCodes.OP_LW:
-            xd, hit = self.data_cache.load(memd)
-            assert type(xd) == int
-            if not hit:
-                logging.info('Miss de lectura @(0x{:04X})'.format(memd))
-                self._misses += 1
-            else:
-                self._hits += 1
+        success = self._lr == memd
 
-        elif op_code == OpCodes.OP_SW:
-            word = self.registers[rf2].data
-            assert type(word) == int
-            hit = self.data_cache.store(memd, word)
+        if success:
+            hit, success = self.data_cache.store_conditional(memd, word)
             if not hit:
-                logging.info('Miss de escritura @(0x{:04X})'.format(memd))
+                logging.info('Miss de escritura condicional @(0x%04X)', memd)
                 self._misses += 1
             else:
                 self._hits += 1
+        else:
+            logging.info('Reserva rota @(0x%04X)', memd)
 
-        elif op_code == OpCodes.OP_LR:
-            xd, hit = self.data_cache.load_reserved(memd)
-            assert type(xd) == int
-            if not hit:
-                logging.info('Miss de lectura reservada @(0x{:04X})'.format(memd))
-                self._misses += 1
-            else:
-                self._hits += 1
+        if success:
+            logging.info('SC success!')
+            xd = word
+        else:
+            logging.info('SC failure!')
+            xd = 0
 
-        elif op_code == OpCodes.OP_SC:
+        regs[rd] = xd
 
-            word = self.registers[rf2].data
-            self.__lr_lock.acquire()
-            success = self.__lr.data == memd
-            self.__lr_lock.release()
+    def _op_beq(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        if regs[rf1] == regs[rf2]:
+            self.pc = self.pc + inm
 
-            if success:
-                hit, success = self.data_cache.store_conditional(memd, word)
-                if not hit:
-                    logging.info('Miss de escritura condicional @(0x{:04X})'.format(memd))
-                    self._misses += 1
-                else:
-                    self._hits += 1
-            else:
-                logging.info('Reserva rota @(0x{:04X})'.format(memd))
+    def _op_bne(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        if regs[rf1] != regs[rf2]:
+            self.pc = self.pc + inm
 
-            if success:
-                logging.info('SC success!')
-                xd = word
-            else:
-                logging.info('SC failure!')
-                xd = 0
+    def _op_jal(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        xd = self.pc
+        self.pc = xd + inm
+        regs[rd] = xd
 
-        return xd
+    def _op_jalr(self, rd: int, rf1: int, rf2: int, inm: int):
+        regs = self.registers
+        xd = self.pc
+        self.pc = regs[rf1] + inm
+        regs[rd] = xd
 
-    def _write_back(self, op_code, rd, xd, jmp, jmp_target):
-        """
-        Etapa de writeback del pipeline, escribe al registro destino el resultado de la operación o la carga de datos
-        de memoria. También maneja los saltos (a pesar de que esto se puede hacer antes como se vio en la teoría era más
-        sencillo para debug hacerlo acá).
-
-        :param op_code:
-        :param rd:
-        :param xd:
-        :param jmp:
-        :param jmp_target:
-        :return:
-        """
-        if op_code in OP_ROUTINE or op_code in OP_BRANCH:
-            if jmp:
-                self.pc.data = jmp_target
+    def _op_fin(self, rd: int, rf1: int, rf2: int, inm: int):
+        self._pcb.status = Pcb.FINISHED
+        self._pcb.quantum = 0
 
-        if op_code in OP_ARITH_REG or op_code in OP_ROUTINE or op_code in OP_LR_SC or op_code == OpCodes.OP_ADDI or op_code == OpCodes.OP_LW:
-            assert type(xd) == int
-            self.registers[rd].data = xd
+    def _op_noop(self, rd: int, rf1: int, rf2: int, inm: int):
+        pass
 
     def __str__(self):
 
-        reg_str = '[\n '
-
-        reg_data_len = max([len(str(reg.data)) for reg in self.registers])
-
-        for i in range(len(self.registers)):
-            reg = self.registers[i]
-            reg_str += '[r{dir:02d}: {data:{reg_len}d}]'.format(dir=reg.address, data=reg.data, reg_len=reg_data_len)
-
-            if i < len(self.registers) - 1:
-                reg_str += ','
-
-                if (i+1)%8 == 0:
-                    reg_str +='\n '
-                else:
-                    reg_str += ' '
-
-        reg_str += '\n]'
-
-
-        pcb_str = '[\n'
-        for k, v in self.log.items():
-            pcb_str += ' PID {:02d}: {:d} corridas\n'.format(k, v)
-
-        pcb_str += ']'
-
+        reg_str = format_registers(self.registers)
 
+        pcb_str = '[\n' + ''.join(' PID {:02d}: {:d} corridas\n'.format(k, v) for k, v in self.log.items()) + ']'
 
         miss_rate = (self._misses) / float(self._hits + self._misses)
         format_str = '{name:s}:\nPC: {pc:d}, LR: {lr:d}, ticks: {clock:d}\nTotal de solicitudes de acceso a memoria:' \
                      ' {total:d}\nTotal de fallos de caché: {miss:d}\nTaza de fallos: {missr:.1f}%\nRegistros:\n' \
                      '{regs:s}\nHilos corridos:\n{hilos:s}\n'
 
-        return format_str.format(name=self.name, pc=self.pc.data, lr=self.__lr.data, clock=self.clock,
+        return format_str.format(name=self.name, pc=self.pc, lr=self._lr, clock=self.clock,
                                  regs=reg_str, missr=miss_rate*100, total=(self._hits+self._misses),
                                  miss=self._misses, hilos=pcb_str)
 
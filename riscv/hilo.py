@@ -1,13 +1,28 @@
-from queue import Queue
+from array import array
+from collections import deque
 
-from typing import List
+
+def format_registers(registers: array) -> str:
+    """
+    Da formato a un banco de registros, 8 registros por línea con el mismo ancho
+
+    :param registers:   Los registros
+    :return:            El texto con los registros
+    """
+    reg_data_len = max(len(str(data)) for data in registers)
+    reg_cells = ['[r{:02d}: {:{}d}]'.format(i, data, reg_data_len) for i, data in enumerate(registers)]
+    reg_rows = [', '.join(reg_cells[i:i+8]) for i in range(0, len(reg_cells), 8)]
+    return '[\n ' + ',\n '.join(reg_rows) + '\n]'
 
 
 class Pcb(object):
     """Clase que modela el PCB de un hilillo"""
+
+    __slots__ = ('pid', 'name', 'registers', 'pc', 'quantum', 'hits', 'misses', 'ticks', 'status')
+
     pid: int
     name: str
-    registers: List[int]
+    registers: array
     pc: int
     quantum: int
     hits: int
@@ -25,7 +40,7 @@ class Pcb(object):
         assert 384 <= starting_addr < 1024
         self.pid = pid
         self.name = name
-        self.registers = [0 for i in range(32)]
+        self.registers = array('q', bytes(8*32))
         self.pc = starting_addr
         self.quantum = 0
         self.hits = 0
@@ -41,48 +56,35 @@ class Pcb(object):
         else:
             estado = 'FINISHED'
 
-        reg_str = '[\n '
-
-        reg_data_len = max([len(str(data)) for data in self.registers])
-
-        for i in range(len(self.registers)):
-            data = self.registers[i]
-            reg_str += '[r{dir:02d}: {data:{reg_len}d}]'.format(dir=i, data=data, reg_len=reg_data_len)
-
-            if i < len(self.registers) - 1:
-                reg_str += ','
-
-                if (i+1)%8 == 0:
-                    reg_str +='\n '
-                else:
-                    reg_str += ' '
-
-        reg_str += '\n]'
+        reg_str = format_registers(self.registers)
 
         format_str = 'P{:02d}: hilo "{:s}" con estado {:s}\nPc: {:d}, ciclos corridos: {:d}\nRegs:\n{:s}\n'
         return format_str.format(self.pid, self.name, estado, self.pc, self.ticks, reg_str)
 
 
 class Scheduler(object):
-    """Scheduler"""
+    """
+    Scheduler. Las colas son ``deque``: ambos cores las usan, pero ``append`` y ``popleft`` son atómicos así que no
+    hace falta el lock que toma ``queue.Queue`` en cada operación.
+    """
 
     INIT_QUANTUM = 25
 
     def __init__(self):
-        self.ready_queue = Queue()
-        self.finished_queue = Queue()
+        self.ready_queue = deque()
+        self.finished_queue = deque()
 
     def next_ready_thread(self) -> Pcb:
-        """Obtiene el próximo hilillo que está listo para ejecutarse"""
-        return self.ready_queue.get(block=False)
+        """Obtiene el próximo hilillo que está listo para ejecutarse, levanta ``IndexError`` si no hay ninguno"""
+        return self.ready_queue.popleft()
 
     def put_ready(self, item: Pcb):
         """Guarda un hilillo en la cola de los que están listos para ejecutarse"""
         assert item.quantum == 0
         item.quantum = self.INIT_QUANTUM
-        return self.ready_queue.put(item, block=False)
+        self.ready_queue.append(item)
 
     def put_finished(self, item: Pcb):
         """Guarda un hilillo en la cola de los que ya terminaron"""
         assert item.quantum == 0
-        return self.finished_queue.put(item, block=False)
+        self.finished_queue.append(item)
@@ -42,6 +42,18 @@ class OpCodes(Enum):
     OP_FIN = 999
 
 
+OPCODE_MAP = {op.value: op for op in OpCodes}
+"""Código de operación para cada valor entero, evita la llamada a ``OpCodes(valor)``"""
+
+
+ARG3_BITS = INS_LENGTH - BS_ARG3
+ARG3_SIGN = 1 << (ARG3_BITS - 1)
+"""Bit de signo del inmediato (arg3) ya desplazado"""
+
+OP_FIN_HEX = OpCodes.OP_FIN_HEX.value
+OP_FIN = OpCodes.OP_FIN.value
+
+
 def dec_opcode(instruction: int):
     return (instruction & M_OPCD) >> BS_OPCD
 
@@ -56,24 +68,19 @@ def dec_arg2(instruction: int):
 
 def dec_arg3(instruction: int):
     data_raw = (instruction & M_ARG3) >> BS_ARG3
-    arg_bits = INS_LENGTH - BS_ARG3
-
-    if data_raw & 2**(arg_bits - 1):
-        val = -(2**arg_bits - data_raw)
-    else:
-        val = data_raw
-
-    return val
+    # Extensión de signo sin saltos: si el bit de signo está encendido el xor lo apaga y la resta deja el valor
+    # negativo, si está apagado el xor lo enciende y la resta lo vuelve a quitar
+    return (data_raw ^ ARG3_SIGN) - ARG3_SIGN
 
 
 def decode(instruction: int):
     """Decodifica una instrucción guardada en un int"""
-    op = dec_opcode(instruction)
-    if op == OpCodes.OP_FIN_HEX.value:
-        op = OpCodes.OP_FIN.value
-    arg1 = dec_arg1(instruction)
-    arg2 = dec_arg2(instruction)
-    arg3 = dec_arg3(instruction)
+    op = instruction & M_OPCD
+    if op == OP_FIN_HEX:
+        op = OP_FIN
+    arg1 = (instruction & M_ARG1) >> BS_ARG1
+    arg2 = (instruction & M_ARG2) >> BS_ARG2
+    arg3 = (((instruction & M_ARG3) >> BS_ARG3) ^ ARG3_SIGN) - ARG3_SIGN
     return op, arg1, arg2, arg3
 
 
@@ -2,6 +2,7 @@ from __future__ import division
 
 import threading
 import logging
+from array import array
 from typing import List, Optional, TYPE_CHECKING
 from .isa import decode
 
@@ -17,6 +18,15 @@ FC = 1
 FM = 2
 """Bandera de modificado en caché"""
 
+FLAG_CHARS = ('I', 'C', 'M')
+"""Letra de cada bandera de caché, indexada por la bandera"""
+
+RP_FIFO = 'fifo'
+"""Política de reemplazo FIFO: las vías de un set se reemplazan en orden circular"""
+
+RP_LRU = 'lru'
+"""Política de reemplazo LRU: se reemplaza la vía inválida o la usada hace más tiempo"""
+
 BUS_DOWNTIME = 2
 MEMORY_LOAD_PENALTY = 32
 
@@ -24,6 +34,8 @@ MEMORY_LOAD_PENALTY = 32
 class CacheBlock(object):
     """Clase que modela un bloque de caché"""
 
+    __slots__ = ('address', 'tag', 'flag', 'palabras', 'bpp', 'data')
+
     def __init__(self, address: int, palabras: int = 4, bpp: int = 4):
         """
         Crea un bloque de caché, inicializa la memoria con 0s y el tag
@@ -39,37 +51,39 @@ class CacheBlock(object):
 
         self.palabras = palabras
         self.bpp = bpp
-        self.data = [0 for i in range(palabras)]
+        self.data = array('q', bytes(8*palabras))
+        """Palabras del bloque, se llenan con una sola copia desde cualquier buffer 'q' (arreglo o vista)"""
 
     def __str__(self):
 
-        if self.flag == FI:
-            flag = 'I'
-        elif self.flag == FC:
-            flag = 'C'
-        elif self.flag == FM:
-            flag = 'M'
-        else:
-            flag = 'X'
+        flag = FLAG_CHARS[self.flag] if 0 <= self.flag < len(FLAG_CHARS) else 'X'
 
-        return 'B{:d}, tag: {:d}, flag: {:s}, data: {:s}'.format(self.address, self.tag, flag, str(self.data))
+        return 'B{:d}, tag: {:d}, flag: {:s}, data: {:s}'.format(self.address, self.tag, flag, str(list(self.data)))
 
 
 class CacheSet(object):
     """Clase que modela un set de bloques de caché en un caché asociativo"""
 
+    __slots__ = ('index', 'assoc', 'ppb', 'fifo', 'order', 'lines', 'tag_map')
+
     def __init__(self, index: int, assoc: int, ppb: int):
         self.index = index
         self.assoc = assoc
         self.ppb = ppb
         self.fifo = 0
+        self.order = list(range(assoc))
+        """Vías del set de la usada hace más tiempo a la más reciente (solo para LRU)"""
         self.lines = [CacheBlock(i, ppb) for i in range(assoc)]
 
+        self.tag_map = {}
+        """Bloque válido del set para cada tag, se mantiene junto con ``lines``"""
+
 
 class CacheMemAssoc(object):
     """Clase que modela una memoria caché asociativa"""
 
-    def __init__(self, name: str, start_addr: int, end_addr: int, assoc: int, num_blocks: int, bpp: int, ppb: int):
+    def __init__(self, name: str, start_addr: int, end_addr: int, assoc: int, num_blocks: int, bpp: int, ppb: int,
+                 replacement: str = RP_FIFO):
         """
         Crear una memoria caché asociativa que mappea al rango de direcciones [start_addr, end_addr[
 
@@ -80,10 +94,12 @@ class CacheMemAssoc(object):
         :param num_blocks:  Cantidad de bloques que se pueden guardar en caché
         :param bpp:         Bytes por palaba
         :param ppb:         Palabras por bloque
+        :param replacement: Política de reemplazo, ``RP_FIFO`` o ``RP_LRU``
         """
 
         assert end_addr > start_addr
         assert num_blocks % assoc == 0
+        assert replacement in (RP_FIFO, RP_LRU)
 
         self.name = name
         self.__start_addr = start_addr
@@ -99,7 +115,17 @@ class CacheMemAssoc(object):
 
         self.sets = [CacheSet(i, self.assoc, self.ppb) for i in range(self.num_sets)]
 
-        self.lock = threading.RLock()
+        self._last_block = CacheBlock(-1, ppb)
+        """Último bloque encontrado por ``load``, se revisa antes de buscar en el set (solo con FIFO)"""
+
+        self.replacement = replacement
+        self._find_owner = self._find_lru if replacement == RP_LRU else self._find
+        """Búsqueda para los accesos del procesador dueño, con LRU además actualiza el orden de uso del set"""
+
+        self._addr_table = [self._decompose_address(addr) for addr in range(start_addr, end_addr)]
+        """Descomposición (block, offset, index, tag) de cada dirección del rango del caché"""
+
+        self.lock = threading.Lock()
 
         self.owner_core: 'Core' = None
         self.bus: Bus = None
@@ -110,29 +136,38 @@ class CacheMemAssoc(object):
 
     def __str__(self):
 
-        format_str = '{:s} ({:d}-way associative cache):\n[\n'.format(self.name, self.assoc)
+        lines = ['{:s} ({:d}-way associative cache):\n[\n'.format(self.name, self.assoc)]
         for set in self.sets:
-            set_str = ' S{:d}:\n [\n'.format(set.index)
-            for block in set.lines:
-                set_str += '   ' + str(block) + '\n'
-            set_str += ' ]\n'
-            format_str += set_str
+            lines.append(' S{:d}:\n [\n'.format(set.index))
+            lines.extend('   ' + str(block) + '\n' for block in set.lines)
+            lines.append(' ]\n')
 
-        return format_str + ']\n'
+        lines.append(']\n')
+        return ''.join(lines)
 
-    def load(self, addr: int) -> (int, bool):
+    def load(self, addr: int, reserve: bool = False) -> (int, bool):
         """
         Carga la palabra de una dirección de memoria. Utiliza el protocolo MSI, en caso de miss accede a bus.
         Si la dirección solicitada no mappea al caché levanta una excepción.
 
         :param addr:    Dirección de memoria de la palabra solicitada
-        :return:        La palabra solicitada
+        :param reserve: Si además escribe una reserva en el bloque (LR)
+        :return:        La palabra solicitada y si fue hit
         """
-        assert self.__start_addr <= addr < self.__end_addr
+        start_addr = self.__start_addr
+        assert start_addr <= addr < self.__end_addr
         if addr % self.bpp != 0:
             logging.warning('LOAD no alineado @{:d} !'.format(addr))
 
-        block_num, offset, index, tag = self._process_address(addr)
+        # Igual que _process_address() pero sin la llamada, load es el camino más usado (todos los fetch pasan por acá)
+        block_num, offset, index, tag = self._addr_table[addr - start_addr]
+
+        # Con el nivel de log por encima de DEBUG (lo normal) ni siquiera se llama a logging.debug
+        debug_on = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if debug_on:
+            logging.debug('accediendo a dir %d, blocknum=%d, index=%d, word_off=%d, tag=%d', addr, block_num, index,
+                          offset, tag)
+            read_msg = 'Read Reserve' if reserve else 'Read'
 
         op_finished = False
         op_local = True
@@ -145,28 +180,42 @@ class CacheMemAssoc(object):
             if op_local:
 
                 self._acquire_local()
-                target_block = self._find(index, tag)
+
+                # Accesos seguidos suelen caer en el mismo bloque (p.e. fetch), si sigue válido y con el mismo tag no
+                # hace falta buscarlo. Con LRU siempre se busca, porque cada acceso debe actualizar el orden de uso
+                target_block = self._last_block
+                if target_block.tag != tag or target_block.flag == FI:
+                    target_block = self._find_owner(index, tag)
+                    if target_block is not None and self.replacement == RP_FIFO:
+                        self._last_block = target_block
 
                 # HIT
                 if target_block is not None:
-                    logging.debug('Read Hit para {:d}, en [set: {:d}, block: {:d}, tag: {:d}] '.format(addr, index, target_block.address, tag))
+                    if debug_on:
+                        logging.debug('%s Hit para %d, en [set: %d, block: %d, tag: %d] ', read_msg, addr, index,
+                                      target_block.address, tag)
+                    if reserve:
+                        self._reserve(block_num)
                     word = target_block.data[offset]
                     op_finished = True
 
                 # MISS
                 else:
-                    logging.debug('Read Miss para {:d}, en [set: {:d}, tag: {:d}] '.format(addr, index, tag))
+                    if debug_on:
+                        logging.debug('%s Miss para %d, en [set: %d, tag: %d] ', read_msg, addr, index, tag)
                     op_local = False
                     hit = False
 
-                self._release_local()
+                if debug_on:
+                    logging.debug('Releasing %s cache lock', self.name)
+                self.lock.release()
 
             # Acceso a bus
             else:
 
                 self._wait_penalty(1)
                 self._acquire_with_bus()
-                target_block = self._find(index, tag)
+                target_block = self._find_owner(index, tag)
 
                 # HIT
                 if target_block is not None:
@@ -177,18 +226,22 @@ class CacheMemAssoc(object):
 
                     victim_b = self._find_victim(index)
 
-                    mem_b = self.bus.snoop_shared(addr, self)
+                    mem_b = self.bus.snoop_shared(addr, block_num, self)
                     self._wait_penalty(MEMORY_LOAD_PENALTY)
 
                     # Sustituir los datos del bloque
-                    victim_b.data[:] = mem_b.data[:]
+                    memoryview(victim_b.data)[:] = mem_b.data
                     victim_b.flag = FC
                     victim_b.tag = block_num
-                    assert len(victim_b.data) == victim_b.palabras
+                    self.sets[index].tag_map[block_num] = victim_b
 
                     word = victim_b.data[offset]
                     hit = False
 
+                # La reserva se escribe antes de soltar el bus, para que un snoop no la pueda invalidar antes
+                if reserve:
+                    self._reserve(block_num)
+
                 self._release_with_bus()
                 op_finished = True
 
@@ -206,101 +259,7 @@ class CacheMemAssoc(object):
         :param val:     El valor a escribir
         :return:        Si fue hit
         """
-        assert self.__start_addr <= addr < self.__end_addr
-        if addr % self.bpp != 0:
-            logging.warning('STORE no alineado @{:d} !'.format(addr))
-
-        block_num, offset, index, tag = self._process_address(addr)
-
-        op_finished = False
-        op_local = True
-        hit = True
-        word = None
-
-        while not op_finished:
-
-            # Sin acceso a bus
-            if op_local:
-
-                self._acquire_local()
-                target_block = self._find(index, tag)
-
-                # HIT
-                if target_block is not None:
-                    logging.debug('Write Hit para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
-
-                    if target_block.flag == FM:
-                        target_block.data[offset] = val
-                        # Si el bloque estaba reservado se invalida la reserva
-                        if self.lr_dir == block_num:
-                            logging.debug('Invalidando reserva del bloque {:d} en {:s}'.format(block_num, self.name))
-                            self.lr_dir = -1
-                        op_finished = True
-
-                    else:
-                        logging.debug('Bloque compartido, se debe invalidar con snooping')
-                        op_local = False
-
-                # MISS
-                else:
-                    logging.debug('Write Miss para {:d}, en [set: {:d}, tag: {:d}]'.format(addr, index, tag))
-                    op_local = False
-                    hit = False
-
-                self._release_local()
-
-            # Acceso a bus
-            else:
-
-                self._wait_penalty(1)
-                self._acquire_with_bus()
-
-                target_block = self._find(index, tag)
-
-                # HIT
-                if target_block is not None:
-                    word = target_block.data[offset]
-                    logging.debug('Write Hit con bus para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
-
-                    if target_block.flag == FM:
-                        logging.warning('Camino inesperado en Store para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
-
-                    else:
-                        assert target_block.flag == FC
-                        logging.debug('Bloque compartido, invalidando por medio de snooping')
-                        mem_b = self.bus.snoop_exclusive(addr, self)
-                        self._wait_penalty(MEMORY_LOAD_PENALTY)
-
-                    target_block.data[offset] = val
-                    target_block.flag = FM
-
-                # MISS
-                else:
-
-                    victim_b = self._find_victim(index)
-
-                    mem_b = self.bus.snoop_exclusive(addr, self)
-                    self._wait_penalty(MEMORY_LOAD_PENALTY)
-
-                    # Sustituir los datos del bloque
-                    victim_b.data[:] = mem_b.data[:]
-                    victim_b.flag = FM
-                    victim_b.tag = block_num
-                    assert len(victim_b.data) == victim_b.palabras
-
-                    victim_b.data[offset] = val
-                    hit = False
-
-                # Si el bloque estaba reservado se invalida la reserva
-                if self.lr_dir == block_num:
-                    logging.debug('Invalidando reserva del bloque {:d} en {:s}'.format(block_num, self.name))
-                    self.lr_dir = -1
-
-                self._release_with_bus()
-                op_finished = True
-
-                self._wait_penalty(BUS_DOWNTIME)
-
+        hit, _ = self._store(addr, val, conditional=False)
         return hit
 
     def load_reserved(self, addr: int) -> (int, bool):
@@ -311,80 +270,16 @@ class CacheMemAssoc(object):
         :param addr:    Dirección de memoria de la palabra solicitada
         :return:        La palabra solicitada y si fue hit
         """
-        assert self.__start_addr <= addr < self.__end_addr
-        if addr % self.bpp != 0:
-            logging.warning('LOAD no alineado @{:d} !'.format(addr))
-
-        block_num, offset, index, tag = self._process_address(addr)
-
-        op_finished = False
-        op_local = True
-        word = None
-        hit = True
-
-        while not op_finished:
-
-            # Sin acceso a bus
-            if op_local:
-
-                self._acquire_local()
-                target_block = self._find(index, tag)
-
-                # HIT
-                if target_block is not None:
-                    logging.debug('Read Reserve Hit para {:d}, en [set: {:d}, block: {:d}, tag: {:d}] '.format(addr, index, target_block.address, tag))
-                    logging.debug('Reservando el bloque {:d} en {:s}'.format(block_num, self.name))
-                    self.lr_dir = block_num
-                    word = target_block.data[offset]
-                    op_finished = True
-
-                # MISS
-                else:
-                    logging.debug('Read Reserve Miss para {:d}, en [set: {:d}, tag: {:d}] '.format(addr, index, tag))
-                    op_local = False
-                    hit = False
-
-                self._release_local()
-
-            # Acceso a bus
-            else:
-
-                self._wait_penalty(1)
-                self._acquire_with_bus()
-                target_block = self._find(index, tag)
-
-                # HIT
-                if target_block is not None:
-                    logging.debug('Reservando el bloque {:d} en {:s}'.format(block_num, self.name))
-                    self.lr_dir = block_num
-                    word = target_block.data[offset]
-
-                # MISS
-                else:
-
-                    victim_b = self._find_victim(index)
+        return self.load(addr, reserve=True)
 
-                    mem_b = self.bus.snoop_shared(addr, self)
-                    self._wait_penalty(MEMORY_LOAD_PENALTY)
-
-                    # Sustituir los datos del bloque
-                    victim_b.data[:] = mem_b.data[:]
-                    victim_b.flag = FC
-                    victim_b.tag = block_num
-                    assert len(victim_b.data) == victim_b.palabras
-
-                    logging.debug('Reservando el bloque {:d} en {:s}'.format(block_num, self.name))
-                    self.lr_dir = block_num
-                    word = victim_b.data[offset]
-                    hit = False
-
-                self._release_with_bus()
-                op_finished = True
-
-                self._wait_penalty(BUS_DOWNTIME)
+    def _reserve(self, block_num: int):
+        """
+        Escribe la reserva de LR, se debe llamar con el caché bloqueado
 
-        return word, hit
-        pass
+        :param block_num:   Bloque reservado
+        """
+        logging.debug('Reservando el bloque %d en %s', block_num, self.name)
+        self.lr_dir = block_num
 
     def store_conditional(self, addr: int, val: int) -> (bool, bool):
         """
@@ -396,114 +291,146 @@ class CacheMemAssoc(object):
         :param val:     El valor a escribir
         :return:        Si fue hit y si tuvo éxito la escritura
         """
-        assert self.__start_addr <= addr < self.__end_addr
-        if addr % self.bpp != 0:
-            logging.warning('STORE no alineado @{:d} !'.format(addr))
+        return self._store(addr, val, conditional=True)
 
-        block_num, offset, index, tag = self._process_address(addr)
+    def _store(self, addr: int, val: int, conditional: bool) -> (bool, bool):
+        """
+        Camino de escritura exclusiva compartido por ``store()`` y ``store_conditional()``. Primero intenta escribir
+        localmente (hit en un bloque modificado), si no accede a bus para invalidar las otras copias o traer el bloque.
 
-        op_finished = False
-        op_local = True
-        hit = True
-        success = False
+        Si es condicional y la dirección no está reservada falla sin acceder a bus. En otro caso la palabra solo se
+        escribe si la reserva sigue en pie y la reserva se consume siempre. Una escritura normal siempre escribe e
+        invalida la reserva propia si era de ese bloque.
 
-        while not op_finished:
+        :param addr:        Dirección de memoria de la palabra que va a escribir
+        :param val:         El valor a escribir
+        :param conditional: Si es la escritura condicional de SC
+        :return:            Si fue hit y si quedó escrito un bloque reservado (el éxito de SC)
+        """
+        start_addr = self.__start_addr
+        assert start_addr <= addr < self.__end_addr
+        if addr % self.bpp != 0:
+            logging.warning('STORE no alineado @{:d} !'.format(addr))
 
-            # Sin acceso a bus
-            if op_local:
+        block_num, offset, index, tag = self._addr_table[addr - start_addr]
 
-                self._acquire_local()
+        find = self._find_owner
+        wait_penalty = self._wait_penalty
 
-                if self.lr_dir != block_num:
-                    op_finished = True
-                    logging.debug('Write Conditional fallo temprano reserva inválida para {:d}, esperaba {:d} y obtuve {:d}'.format(addr, block_num, self.lr_dir))
+        debug_on = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if debug_on:
+            logging.debug('accediendo a dir %d, blocknum=%d, index=%d, word_off=%d, tag=%d', addr, block_num, index,
+                          offset, tag)
+            write_msg = 'Write Conditional' if conditional else 'Write'
 
-                else:
+        # Sin acceso a bus
+        self._acquire_local()
 
-                    target_block = self._find(index, tag)
+        if conditional and self.lr_dir != block_num:
+            if debug_on:
+                logging.debug('Write Conditional fallo temprano reserva inválida para %d, esperaba %d y obtuve %d',
+                              addr, block_num, self.lr_dir)
+            self.lock.release()
+            return True, False
 
-                    # HIT
-                    if target_block is not None:
-                        logging.debug('Write Conditional Hit para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
+        target_block = find(index, tag)
 
-                        if target_block.flag == FM:
-                            if self.lr_dir == block_num:
-                                target_block.data[offset] = val
-                                success = True
-                            self.lr_dir = -1
-                            op_finished = True
+        # HIT
+        if target_block is not None:
+            if debug_on:
+                logging.debug('%s Hit para %d, en [set: %d, block: %d, tag: %d]', write_msg, addr, index,
+                              target_block.address, tag)
 
-                        else:
-                            logging.debug('Bloque compartido, se debe invalidar con snooping')
-                            op_local = False
+            if target_block.flag == FM:
+                # Si el bloque estaba reservado se consume la reserva
+                reserved = self.lr_dir == block_num
+                if reserved or not conditional:
+                    target_block.data[offset] = val
+                if reserved:
+                    if debug_on:
+                        logging.debug('Invalidando reserva del bloque %d en %s', block_num, self.name)
+                    self.lr_dir = -1
 
-                    # MISS
-                    else:
-                        logging.debug('Write Conditional Miss para {:d}, en [set: {:d}, tag: {:d}]'.format(addr, index, tag))
-                        op_local = False
-                        hit = False
+                if debug_on:
+                    if reserved and conditional:
+                        logging.debug('Éxito en la escritura condicional')
+                    logging.debug('Releasing %s cache lock', self.name)
+                self.lock.release()
+                return True, reserved
 
-                self._release_local()
+            if debug_on:
+                logging.debug('Bloque compartido, se debe invalidar con snooping')
+            hit = True
 
-            # Acceso a bus
-            else:
+        # MISS
+        else:
+            if debug_on:
+                logging.debug('%s Miss para %d, en [set: %d, tag: %d]', write_msg, addr, index, tag)
+            hit = False
 
-                self._wait_penalty(1)
-                self._acquire_with_bus()
+        if debug_on:
+            logging.debug('Releasing %s cache lock', self.name)
+        self.lock.release()
 
-                target_block = self._find(index, tag)
+        # Acceso a bus
+        bus = self.bus
+        wait_penalty(1)
+        self._acquire_with_bus()
 
-                # HIT
-                if target_block is not None:
-                    word = target_block.data[offset]
-                    logging.debug('Write Conditional Hit con bus para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
+        target_block = find(index, tag)
 
-                    if target_block.flag == FM:
-                        logging.warning('Camino inesperado en Store Conditional para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(addr, index, target_block.address, tag))
+        # HIT
+        if target_block is not None:
+            if debug_on:
+                logging.debug('%s Hit con bus para %d, en [set: %d, block: %d, tag: %d]', write_msg, addr, index,
+                              target_block.address, tag)
 
-                    else:
-                        assert target_block.flag == FC
-                        logging.debug('Bloque compartido, invalidando por medio de snooping')
-                        mem_b = self.bus.snoop_exclusive(addr, self)
-                        self._wait_penalty(MEMORY_LOAD_PENALTY)
+            if target_block.flag == FM:
+                logging.warning('Camino inesperado en {:s} para {:d}, en [set: {:d}, block: {:d}, tag: {:d}]'.format(
+                    'Store Conditional' if conditional else 'Store', addr, index, target_block.address, tag))
 
-                    if self.lr_dir == block_num:
-                        target_block.data[offset] = val
-                        success = True
-                    target_block.flag = FM
+            else:
+                assert target_block.flag == FC
+                if debug_on:
+                    logging.debug('Bloque compartido, invalidando por medio de snooping')
+                bus.snoop_exclusive(addr, block_num, self)
+                wait_penalty(MEMORY_LOAD_PENALTY)
 
-                # MISS
-                else:
+            target_block.flag = FM
 
-                    victim_b = self._find_victim(index)
+        # MISS
+        else:
 
-                    mem_b = self.bus.snoop_exclusive(addr, self)
-                    self._wait_penalty(MEMORY_LOAD_PENALTY)
+            target_block = self._find_victim(index)
 
-                    # Sustituir los datos del bloque
-                    victim_b.data[:] = mem_b.data[:]
-                    victim_b.flag = FM
-                    victim_b.tag = block_num
-                    assert len(victim_b.data) == victim_b.palabras
+            mem_b = bus.snoop_exclusive(addr, block_num, self)
+            wait_penalty(MEMORY_LOAD_PENALTY)
 
-                    if self.lr_dir == block_num:
-                        victim_b.data[offset] = val
-                        success = True
+            # Sustituir los datos del bloque
+            memoryview(target_block.data)[:] = mem_b.data
+            target_block.flag = FM
+            target_block.tag = block_num
+            self.sets[index].tag_map[block_num] = target_block
 
-                    hit = False
+            hit = False
 
-                # Consumir reserva
-                self.lr_dir = -1
+        reserved = self.lr_dir == block_num
+        if reserved or not conditional:
+            target_block.data[offset] = val
 
-                self._release_with_bus()
-                op_finished = True
+        # Consumir la reserva (SC la consume aunque ya no fuera de este bloque)
+        if reserved or conditional:
+            if debug_on:
+                logging.debug('Invalidando reserva del bloque %d en %s', block_num, self.name)
+            self.lr_dir = -1
 
-                self._wait_penalty(BUS_DOWNTIME)
+        self._release_with_bus()
+        wait_penalty(BUS_DOWNTIME)
 
-        if success:
+        if reserved and conditional and debug_on:
             logging.debug('Éxito en la escritura condicional')
 
-        return hit, success
+        return hit, reserved
 
     def acquire_external(self, requester: 'Core'):
         """
@@ -527,14 +454,25 @@ class CacheMemAssoc(object):
         block_num, offset, index, tag = self._process_address(addr)
 
         if invalidate_reserve:
-            logging.debug('Reserve invalidate requested on {:s} @block {:d}'.format(self.name, block_num))
+            logging.debug('Reserve invalidate requested on %s @block %d', self.name, block_num)
             if block_num == self.lr_dir:
                 logging.debug('Reserve was invalidated')
                 self.lr_dir = -1
 
+        # Un acceso externo no cuenta como uso del bloque para LRU
         target_block = self._find(index, tag)
         return target_block
 
+    def invalidate_external(self, block: CacheBlock):
+        """
+        Invalida un bloque del caché por snooping. Este método debe usarse en conjunto con ``acquire_external()`` y
+        ``release_external()``.
+
+        :param block:   El bloque (obtenido con ``snoop_find()``) que se invalida
+        """
+        block.flag = FI
+        del self.sets[block.tag % self.num_sets].tag_map[block.tag]
+
     def release_external(self, requester: 'Core'):
         """
         Libera la caché luego de un uso externo (a través del bus)
@@ -549,6 +487,21 @@ class CacheMemAssoc(object):
     def _process_address(self, addr: int):
         """
         Procesa una dirección de memoria para obtener el número de bloque, index en el caché y offset de palabra.
+        Usa la tabla calculada al crear el caché.
+
+        :param addr:    Dirección de memoria
+        :return:        block, offset, index, tag
+        """
+        block, offset, index, tag = self._addr_table[addr - self.__start_addr]
+
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug('accediendo a dir %d, blocknum=%d, index=%d, word_off=%d, tag=%d', addr, block, index, offset,
+                          tag)
+        return block, offset, index, tag
+
+    def _decompose_address(self, addr: int):
+        """
+        Calcula el número de bloque, index en el caché y offset de palabra de una dirección de memoria
 
         :param addr:    Dirección de memoria
         :return:        block, offset, index, tag
@@ -560,7 +513,6 @@ class CacheMemAssoc(object):
         # tag = block // self.num_sets
         tag = block
 
-        logging.debug('accediendo a dir {:d}, blocknum={:d}, index={:d}, word_off={:d}, tag={:d}'.format(addr, block, index, offset, tag))
         return block, offset, index, tag
 
     def _find(self, index: int, tag: int):
@@ -571,33 +523,54 @@ class CacheMemAssoc(object):
         :param tag:     Tag del bloque que se está buscando
         :return:        El bloque buscado en caso de hit, None en caso contrario
         """
-        target = None
-        for block in self.sets[index].lines:
-            if (block.tag == tag) and (block.flag != FI):
-                target = block
-                break
+        return self.sets[index].tag_map.get(tag)
 
-        return target
+    def _find_lru(self, index: int, tag: int):
+        """
+        Igual que ``_find``, pero además marca el bloque encontrado como el usado más recientemente en su set
+
+        :param index:   Índice del set en el cual se encuentra el bloque
+        :param tag:     Tag del bloque que se está buscando
+        :return:        El bloque buscado en caso de hit, None en caso contrario
+        """
+        cache_set = self.sets[index]
+        target_block = cache_set.tag_map.get(tag)
+        if target_block is not None:
+            order = cache_set.order
+            order.remove(target_block.address)
+            order.append(target_block.address)
+
+        return target_block
 
     def _find_victim(self, index: int):
         """
-        Se encarga de seleccionar el bloque víctima y hacer write back (evict) de ser necesario.
+        Se encarga de seleccionar el bloque víctima según la política de reemplazo y hacer write back (evict) de ser
+        necesario.
         :param index:   Index del set donde se va a seleccionar la vítima
         :return:        Bloque de caché seleccionado ya evacuado
         """
+        cache_set = self.sets[index]
+
+        if self.replacement == RP_LRU:
+            # El bloque que entra pasa a ser el usado más recientemente
+            # Primero una vía libre, si no hay el bloque usado hace más tiempo
+            victim_i = next((i for i, block in enumerate(cache_set.lines) if block.flag == FI), cache_set.order[0])
+            cache_set.order.remove(victim_i)
+            cache_set.order.append(victim_i)
+        else:
+            victim_i = cache_set.fifo
+            cache_set.fifo = (victim_i + 1) % self.assoc
 
-        victim_i = self.sets[index].fifo
-        victim_b = self.sets[index].lines[victim_i]
+        victim_b = cache_set.lines[victim_i]
 
         if victim_b.flag == FM:
-            # Write Back
-            # victim_b_num = victim_b.tag + index
-            victim_b_num = victim_b.tag
-            victim_addr = victim_b_num * self.ppb * self.bpp
-            self.bus.write_back(victim_addr, victim_b, self)
+            # Write Back, el tag es el número de bloque en memoria
+            self.bus.write_back(victim_b, self)
             self._wait_penalty(MEMORY_LOAD_PENALTY)
 
-        self.sets[index].fifo = (victim_i + 1) % self.assoc
+        # Un bloque inválido puede conservar un tag viejo que ahora es válido en otra vía
+        if cache_set.tag_map.get(victim_b.tag) is victim_b:
+            del cache_set.tag_map[victim_b.tag]
         victim_b.flag = FI
         return victim_b
 
@@ -611,8 +584,7 @@ class CacheMemAssoc(object):
         if waiting_core is None:
             waiting_core = self.owner_core
 
-        for i in range(clock_cycles):
-            waiting_core.clock_tick()
+        waiting_core.clock_tick(clock_cycles)
 
     def _acquire_local(self, waiting_core: 'Core' = None):
         """
@@ -625,17 +597,24 @@ class CacheMemAssoc(object):
         if waiting_core is None:
             waiting_core = self.owner_core
 
+        debug_on = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        # Con contención el ciclo se repite una vez por ciclo de reloj
+        acquire = self.lock.acquire
+        clock_tick = waiting_core.clock_tick
+
         while True:
 
-            got_lock = self.lock.acquire(False)
+            got_lock = acquire(False)
 
             if got_lock:
-                logging.debug('Got {:s} cache lock'.format(self.name))
+                if debug_on:
+                    logging.debug('Got %s cache lock', self.name)
                 break
-            else:
-                logging.debug('Failed to get {:s} cache lock'.format(self.name))
+            elif debug_on:
+                logging.debug('Failed to get %s cache lock', self.name)
 
-            waiting_core.clock_tick()
+            clock_tick()
 
         return
 
@@ -650,22 +629,31 @@ class CacheMemAssoc(object):
         if waiting_core is None:
             waiting_core = self.owner_core
 
+        debug_on = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        bus_lock = self.bus.lock
+        acquire = self.lock.acquire
+        clock_tick = waiting_core.clock_tick
+
         while True:
 
-            bus_locked = self.bus.lock.acquire(False)
+            bus_locked = bus_lock.acquire(False)
 
             if bus_locked:
-                logging.debug('Got bus lock')
-                cache_locked = self.lock.acquire(False)
+                if debug_on:
+                    logging.debug('Got bus lock')
+                cache_locked = acquire(False)
 
                 if cache_locked:
-                    logging.debug('Got {:s} cache lock'.format(self.name))
+                    if debug_on:
+                        logging.debug('Got %s cache lock', self.name)
                     break
 
-                logging.debug('Giving up bus lock')
-                self.bus.lock.release()
+                if debug_on:
+                    logging.debug('Giving up bus lock')
+                bus_lock.release()
 
-            waiting_core.clock_tick()
+            clock_tick()
 
         return
 
@@ -675,7 +663,8 @@ class CacheMemAssoc(object):
 
         :return:
         """
-        logging.debug('Releasing {:s} cache lock'.format(self.name))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug('Releasing %s cache lock', self.name)
         self.lock.release()
         return
 
@@ -685,7 +674,8 @@ class CacheMemAssoc(object):
 
         :return:
         """
-        logging.debug('Releasing bus and {:s} cache lock'.format(self.name))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug('Releasing bus and %s cache lock', self.name)
         self.lock.release()
         self.bus.lock.release()
         return
@@ -694,16 +684,38 @@ class CacheMemAssoc(object):
 class RamBlock(object):
     """Clase que modela un bloque de memoria principal"""
 
-    def __init__(self, address: int, palabras: int = 4, bpp: int = 4):
+    __slots__ = ('address', 'palabras', 'bpp', 'data')
+
+    def __init__(self, address: int, palabras: int = 4, bpp: int = 4, data=None):
+        """
+        Crea un bloque de memoria principal
+
+        :param address:     Dirección inicial del bloque
+        :param palabras:    Cantidad de palabaras por bloque
+        :param bpp:         Bytes por palabra
+        :param data:        Palabras del bloque (p.e. una vista a la memoria de ``RamMemory``), si no se indica se
+                            inicializan en 1
+        """
         assert(address % bpp == 0)
         self.address = address
 
         self.palabras = palabras
         self.bpp = bpp
-        self.data = [1 for i in range(palabras)]
+        self.data = array('q', [1]) * palabras if data is None else data
 
     def __str__(self):
-        return 'B{:02d}, data: {:s}'.format(self.address//(self.bpp*self.palabras), str(self.data))
+        return 'B{:02d}, data: {:s}'.format(self.address//(self.bpp*self.palabras), str(list(self.data)))
+
+
+def make_arena(num_words: int) -> memoryview:
+    """
+    Crea un buffer de palabras contiguo para repartir entre varias memorias con vistas (``arena[i:j]``), así todas
+    las memorias de una simulación comparten una sola asignación
+
+    :param num_words:   Número total de palabras
+    :return:            Vista al buffer
+    """
+    return memoryview(array('q', bytes(8*num_words)))
 
 
 class RamMemory(object):
@@ -711,7 +723,8 @@ class RamMemory(object):
 
     blocks: List[RamBlock]
 
-    def __init__(self, name: str, start_addr: int, end_addr: int, num_blocks: int, bpp: int, ppb: int):
+    def __init__(self, name: str, start_addr: int, end_addr: int, num_blocks: int, bpp: int, ppb: int,
+                 words: Optional[memoryview] = None):
         """
         :param name:        Nombre de la memoria
         :param start_addr:  Dirección inicial (inclusiva)
@@ -719,6 +732,8 @@ class RamMemory(object):
         :param num_blocks:  Número de bloques en la memoria
         :param bpp:         Bytes por palabra
         :param ppb:         Palabras por bloque
+        :param words:       Buffer de palabras preasignado (p.e. una vista a una porción de un arreglo compartido por
+                            varias memorias, ver ``make_arena``), si no se indica se crea uno nuevo
         """
 
         self.name = name
@@ -727,35 +742,48 @@ class RamMemory(object):
         assert start_addr + num_blocks*ppb*bpp == end_addr
         self.__start_addr = start_addr
         self.__end_addr = end_addr
+        self.__start_block = start_addr // (ppb * bpp)
         self.num_blocks = num_blocks
         self.bpp = bpp
         self.ppb = ppb
 
-        self.blocks = [RamBlock(i*ppb*bpp + start_addr, ppb, bpp) for i in range(num_blocks)]
+        if words is None:
+            self.words = array('q', [1]) * (num_blocks*ppb)
+        else:
+            assert len(words) == num_blocks*ppb
+            words[:] = array('q', [1]) * len(words)
+            self.words = words
+        """Todas las palabras de la memoria en un solo buffer contiguo"""
+
+        # Los bloques son vistas al buffer de palabras, no tienen datos propios
+        words_view = memoryview(self.words)
+        self.blocks = [RamBlock(i*ppb*bpp + start_addr, ppb, bpp, words_view[i*ppb:(i+1)*ppb])
+                       for i in range(num_blocks)]
         self.data_format = 'default'
 
-    def get(self, addr: int) -> RamBlock:
+    def get(self, block_num: int) -> RamBlock:
         """
-        Obtiene el bloque que contiene una dirección de memoria
+        Obtiene un bloque de la memoria
 
-        :param addr:    La dirección de memoria
-        :return:        El bloque
+        :param block_num:   El número de bloque (el mismo que usan las cachés como tag)
+        :return:            El bloque
         """
-        return self._find(addr)
+        i = block_num - self.__start_block
+        assert 0 <= i < self.num_blocks
+        return self.blocks[i]
 
-    def set(self, addr: int, cache_block: CacheBlock):
+    def set_block(self, cache_block: CacheBlock):
         """
-        Actualiza los datos de un bloque que contiene una dirección de memoria a partir de un bloque de caché
+        Actualiza los datos de un bloque de la memoria a partir de un bloque de caché, el tag del bloque de caché es
+        su número de bloque en memoria
 
-        :param addr:            La dirección de memoria
         :param cache_block:     El bloque con los datos nuevos
         :return:
         """
         assert self.ppb == len(cache_block.data)
-        assert self.bpp == cache_block.bpp
-        block = self._find(addr)
-        block.data[:] = cache_block.data[:]
-        return
+        word_i = (cache_block.tag - self.__start_block) * self.ppb
+        assert 0 <= word_i < len(self.words)
+        self.words[word_i:word_i + self.ppb] = cache_block.data
 
     def load(self, addr: int, data: List[int]):
         """
@@ -765,56 +793,33 @@ class RamMemory(object):
         :param data:    Los datos a guardar
         :return:
         """
-        bn_i = (addr - self.__start_addr) // (self.ppb * self.bpp)
-        off_i = ((addr - self.__start_addr) % (self.ppb * self.bpp)) // self.bpp
+        word_i = (addr - self.__start_addr) // self.bpp
+        assert 0 <= word_i and word_i + len(data) <= len(self.words)
 
-        logging.debug('Copying {:d} words into memory starting @ 0x{:04X}, [block {:d} offset {:d}]'.format(len(data), addr, bn_i, off_i))
-        for datum in data:
-
-            self.blocks[bn_i].data[off_i] = datum
-            off_i += 1
-
-            if off_i >= self.ppb:
-                off_i = 0
-                bn_i += 1
-
-        last_addr = self.__start_addr + bn_i*self.ppb*self.bpp + (off_i)*self.bpp
-        logging.debug('Finished copying last address @ 0x{:04X},  next = [block {:d} offset {:d}]'.format(last_addr, bn_i, off_i))
-
-    def _find(self, addr: int):
-        """
-        Obtiene el bloque correspondiente a una dirección de memoria
-
-        :param addr:    La dirección de memoria
-        :return:        El bloque
-        """
-        assert self.__start_addr <= addr < self.__end_addr
-
-        block_num = (addr - self.__start_addr) // (self.ppb * self.bpp)
-        block = self.blocks[block_num]
-        assert block.address <= addr < block.address + self.bpp * self.ppb
-        return block
+        logging.debug('Copying %d words into memory starting @ 0x%04X', len(data), addr)
+        self.words[word_i:word_i + len(data)] = array('q', data)
 
     def __str__(self):
 
-        format_str = '{:s} :\n[\n'.format(self.name)
+        lines = ['{:s} :\n[\n'.format(self.name)]
 
         for block in self.blocks:
 
             if self.data_format == 'default':
-                format_str += ' 0x{:04X}: [{:s}]\n'.format(block.address, str(block))
+                lines.append(' 0x{:04X}: [{:s}]\n'.format(block.address, str(block)))
 
             elif self.data_format == 'hex':
                 block_data_str = [hex(data) for data in block.data]
                 block_str = 'B{:02d}, data: {:s}'.format(block.address//(block.bpp*block.palabras), str(block_data_str))
-                format_str += ' 0x{:04X}: [{:s}]\n'.format(block.address, block_str)
+                lines.append(' 0x{:04X}: [{:s}]\n'.format(block.address, block_str))
 
             elif self.data_format == 'ins':
                 block_data_str = [decode(x) for x in block.data]
                 block_str = 'B{:02d}, data: {:s}'.format(block.address//(block.bpp*block.palabras), str(block_data_str))
-                format_str += ' 0x{:04X}: [{:s}]\n'.format(block.address, block_str)
+                lines.append(' 0x{:04X}: [{:s}]\n'.format(block.address, block_str))
 
-        return format_str + ']\n'
+        lines.append(']\n')
+        return ''.join(lines)
 
 
 class Bus(object):
@@ -825,25 +830,24 @@ class Bus(object):
         self.name = name
         self.__memory = memory
         self.__caches = caches
-        self.lock = threading.RLock()
+        self.lock = threading.Lock()
 
         for cache in caches:
             cache.bus = self
 
-    def snoop_shared(self, addr: int, requester: CacheMemAssoc) -> RamBlock:
+    def snoop_shared(self, addr: int, block_num: int, requester: CacheMemAssoc) -> RamBlock:
         """
         Hace snooping para lectura con el protocolo MSI. Busca un bloque para una dirección de memoria, si está
         modificado en otra caché hace writeback y lo deja compartido. Si no lo encuentra en ninguna caché lo
         obtiene de memoria.
 
         :param addr:        La dirección de memoria solicitada
+        :param block_num:   El número de bloque de la dirección, ya calculado por la caché que solicita
         :param requester:   La caché que solicita
         :return:            El bloque con los datos
         """
         assert requester in self.__caches
 
-        block = None
-
         for cache in self.__caches:
 
             if cache is requester:
@@ -854,30 +858,27 @@ class Bus(object):
             cache_block = cache.snoop_find(addr)
 
             if cache_block:
-                logging.debug('Snoop hit @{:d} en caché {:s}'.format(addr, cache.name))
+                logging.debug('Snoop hit @%d en caché %s', addr, cache.name)
 
                 if cache_block.flag == FM:
                     logging.debug('Snooped dirty block')
-                    self.__memory.set(addr, cache_block)
+                    self.__memory.set_block(cache_block)
                     cache_block.flag = FC
 
-                aligned_addr = cache_block.tag * (cache_block.bpp * cache_block.palabras)
-                block = RamBlock(address=aligned_addr, palabras=cache_block.palabras, bpp=cache_block.bpp)
-                block.data[:] = cache_block.data[:]
                 cache.release_external(requester.owner_core)
                 break
 
             else:
                 cache.release_external(requester.owner_core)
 
-        if block is None:
-
-            logging.debug('Snoop miss @{:d} defaulting to memory'.format(addr))
-            block = self.__memory.get(addr)
+        else:
+            logging.debug('Snoop miss @%d defaulting to memory', addr)
 
-        return block
+        # Luego del write back (si hacía falta) el bloque en memoria está al día, así que se devuelve ese mismo en
+        # lugar de copiar los datos a un bloque temporal
+        return self.__memory.get(block_num)
 
-    def snoop_exclusive(self, addr: int, requester: CacheMemAssoc) -> RamBlock:
+    def snoop_exclusive(self, addr: int, block_num: int, requester: CacheMemAssoc) -> RamBlock:
         """
         Hace snooping para escritura con el protocolo MSI. Busca un bloque para una dirección de memoria, si está
         modificado en otra caché hace writeback y lo deja compartido. Si está compartido lo invalida. Si no lo encuentra
@@ -885,13 +886,12 @@ class Bus(object):
         bloque (si la tenían)
 
         :param addr:        La dirección de memoria solicitada
+        :param block_num:   El número de bloque de la dirección, ya calculado por la caché que solicita
         :param requester:   La caché que solicita
         :return:            El bloque con los datos
         """
         assert requester in self.__caches
 
-        block = None
-
         for cache in self.__caches:
 
             if cache is requester:
@@ -903,46 +903,41 @@ class Bus(object):
 
             if cache_block:
                 # Hit
-                logging.debug('Snoop Exclusive hit @{:d} en caché {:s}'.format(addr, cache.name))
+                logging.debug('Snoop Exclusive hit @%d en caché %s', addr, cache.name)
 
                 if cache_block.flag == FM:
                     logging.debug('Snooped dirty block, invalidating')
-                    self.__memory.set(addr, cache_block)
-                    cache_block.flag = FI
-                    aligned_addr = cache_block.tag * (cache_block.bpp * cache_block.palabras)
-                    block = RamBlock(address=aligned_addr, palabras=cache_block.palabras, bpp=cache_block.bpp)
-                    block.data[:] = cache_block.data[:]
+                    self.__memory.set_block(cache_block)
+                    cache.invalidate_external(cache_block)
                     cache.release_external(requester.owner_core)
                     break
 
                 else:
                     logging.debug('Snooped shared block, invalidating')
                     assert cache_block.flag == FC
-                    cache_block.flag = FI
+                    cache.invalidate_external(cache_block)
                     cache.release_external(requester.owner_core)
 
             else:
                 # Miss
                 cache.release_external(requester.owner_core)
 
-        if block is None:
-
-            logging.debug('Snoop Exclusive miss or all shared @{:d} defaulting to memory'.format(addr))
-            block = self.__memory.get(addr)
+        else:
+            logging.debug('Snoop Exclusive miss or all shared @%d defaulting to memory', addr)
 
-        return block
+        # Igual que en snoop_shared, luego del write back el bloque en memoria está al día
+        return self.__memory.get(block_num)
 
-    def write_back(self, addr: int, block: CacheBlock, requester: CacheMemAssoc):
+    def write_back(self, block: CacheBlock, requester: CacheMemAssoc):
         """
-        Escribe un bloque de caché correspondiente a una dirección en memoria
+        Escribe un bloque de caché en memoria, el tag del bloque es su número de bloque en memoria
 
-        :param addr:        La dirección
         :param block:       El bloque de caché
         :param requester:   La caché que hace la escritura
         :return:
         """
-        logging.debug('Write back requested by for address {:d}, block: [{:s}]'.format(addr, str(block), hex(id(requester))))
-        self.__memory.set(addr, block)
+        logging.debug('Write back requested by %s for block %d: [%s]', requester.name, block.tag, block)
+        self.__memory.set_block(block)
         return
 
     def __str__(self):
@@ -61,7 +61,7 @@ class SingleCoreTestCase(unittest.TestCase):
 
         for t in reg_state:
             r_dir, r_val = t
-            self.assertEqual(core_inst.registers[r_dir].data, r_val)
+            self.assertEqual(core_inst.registers[r_dir], r_val)
 
     def test_hilo11(self):
 
@@ -77,7 +77,7 @@ class SingleCoreTestCase(unittest.TestCase):
 
         for t in expected_regs:
             r_dir, r_val = t
-            self.assertEqual(self.core0.registers[r_dir].data, r_val, "Unexpected register value in r{:02d}".format(r_dir))
+            self.assertEqual(self.core0.registers[r_dir], r_val, "Unexpected register value in r{:02d}".format(r_dir))
 
 
     def test_hilo12(self):
@@ -94,6 +94,6 @@ class SingleCoreTestCase(unittest.TestCase):
 
         for t in expected_regs:
             r_dir, r_val = t
-            self.assertEqual(self.core0.registers[r_dir].data, r_val, "Unexpected register value in r{:02d}".format(r_dir))
+            self.assertEqual(self.core0.registers[r_dir], r_val, "Unexpected register value in r{:02d}".format(r_dir))
 
 
@@ -0,0 +1,103 @@
+import unittest
+from riscv import core, memory, util
+
+
+class CacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+
+        global_vars = util.GlobalVars(1)
+
+        mem_data = memory.RamMemory('Memoria de datos', start_addr=0, end_addr=384, num_blocks=24, bpp=4, ppb=4)
+        core0 = core.Core('CPU0', global_vars)
+        core1 = core.Core('CPU1', global_vars)
+        cache_data0 = memory.CacheMemAssoc('Data$0', start_addr=0, end_addr=384, assoc=4, num_blocks=8, bpp=4, ppb=4)
+        cache_data1 = memory.CacheMemAssoc('Data$1', start_addr=0, end_addr=384, assoc=1, num_blocks=8, bpp=4, ppb=4)
+
+        core0.data_cache = cache_data0
+        cache_data0.owner_core = core0
+        core1.data_cache = cache_data1
+        cache_data1.owner_core = core1
+
+        bus_data = memory.Bus('Bus de datos', memory=mem_data, caches=[cache_data0, cache_data1])
+
+        self.core0 = core0
+        self.core1 = core1
+        self.cache_data0 = cache_data0
+        self.cache_data1 = cache_data1
+        self.mem_data = mem_data
+        self.bus_data = bus_data
+
+    def test_load_miss_then_hit(self):
+
+        word, hit = self.cache_data0.load(20)
+        self.assertEqual(word, 1)
+        self.assertFalse(hit)
+
+        word, hit = self.cache_data0.load(24)
+        self.assertEqual(word, 1)
+        self.assertTrue(hit)
+
+    def test_store_invalidates_other_cache(self):
+
+        self.cache_data1.load(64)
+        self.assertIsNotNone(self.cache_data1.snoop_find(64))
+
+        self.cache_data0.store(64, 7)
+        self.assertIsNone(self.cache_data1.snoop_find(64))
+
+        word, hit = self.cache_data1.load(64)
+        self.assertEqual(word, 7)
+        self.assertFalse(hit)
+
+    def test_eviction_writes_back(self):
+
+        # Bloques 0 y 8 mapean al mismo set del caché de mapeo directo
+        self.cache_data1.store(0, 5)
+        self.cache_data1.load(128)
+
+        self.assertIsNone(self.cache_data1.snoop_find(0))
+        self.assertIsNotNone(self.cache_data1.snoop_find(128))
+        self.assertEqual(self.mem_data.get(0).data[0], 5)
+
+    def test_store_conditional_needs_reservation(self):
+
+        # Sin reserva falla y no escribe
+        hit, success = self.cache_data0.store_conditional(32, 9)
+        self.assertFalse(success)
+        self.assertEqual(self.cache_data0.load(32)[0], 1)
+
+        # Con reserva escribe y la consume
+        self.cache_data0.load_reserved(32)
+        hit, success = self.cache_data0.store_conditional(32, 9)
+        self.assertTrue(success)
+        self.assertEqual(self.cache_data0.load(32)[0], 9)
+        self.assertEqual(self.cache_data0.lr_dir, -1)
+
+    def test_store_from_other_cache_breaks_reservation(self):
+
+        self.cache_data0.load_reserved(32)
+        self.cache_data1.store(32, 5)
+
+        hit, success = self.cache_data0.store_conditional(32, 9)
+        self.assertFalse(success)
+        self.assertEqual(self.cache_data0.load(32)[0], 5)
+
+    def test_lru_evicts_least_recently_used(self):
+
+        cache_lru = memory.CacheMemAssoc('Data$LRU', start_addr=0, end_addr=384, assoc=4, num_blocks=8, bpp=4, ppb=4,
+                                         replacement=memory.RP_LRU)
+        cache_lru.owner_core = self.core0
+        memory.Bus('Bus LRU', memory=self.mem_data, caches=[cache_lru])
+
+        # Los bloques 0, 2, 4, 6 y 8 mapean al set 0, el bloque 0 se vuelve a usar antes de cargar el 8
+        for block in (0, 2, 4, 6, 0, 8):
+            cache_lru.load(block*16)
+
+        self.assertIsNotNone(cache_lru.snoop_find(0))
+        self.assertIsNone(cache_lru.snoop_find(2*16))
+        self.assertIsNotNone(cache_lru.snoop_find(8*16))
+
+
+if __name__ == '__main__':
+    unittest.main()
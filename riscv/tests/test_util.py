@@ -0,0 +1,62 @@
+import os
+import tempfile
+import threading
+import unittest
+from riscv import util
+
+
+class ClockBarrierTestCase(unittest.TestCase):
+
+    def test_multi_cycle_wait(self):
+
+        barrier = util.ClockBarrier(2)
+        ticks = []
+
+        def stalled():
+            barrier.wait(5)
+            ticks.append(len(ticks))
+
+        t = threading.Thread(target=stalled)
+        t.start()
+
+        # El otro participante tiene que pasar 5 veces por la barrera antes de que el detenido despierte
+        for i in range(5):
+            self.assertEqual(ticks, [])
+            barrier.wait()
+
+        t.join(timeout=5)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(ticks, [0])
+
+    def test_single_party_does_not_block(self):
+
+        barrier = util.ClockBarrier(1)
+        barrier.wait(32)
+        barrier.wait()
+        self.assertEqual(barrier.n_waiting, 0)
+
+
+class ReadHiloTestCase(unittest.TestCase):
+
+    def _write(self, text):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w') as file:
+            file.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_reads_one_instruction_per_line(self):
+
+        path = self._write('19 0 2 5\n999 0 0 0\n')
+        self.assertEqual(util.read_hilo(path), [util.encode(19, 0, 2, 5), util.encode(999, 0, 0, 0)])
+
+    def test_rejects_line_with_wrong_field_count(self):
+
+        # El total de campos es múltiplo de 4, pero las líneas no tienen 4 campos cada una
+        path = self._write('19 0 2\n5 999 0 0 0\n')
+        with self.assertRaises(AssertionError):
+            util.read_hilo(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
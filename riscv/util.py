@@ -1,6 +1,7 @@
 import threading
 import logging
 
+from collections import deque
 from typing import List
 
 from .hilo import Scheduler, Pcb
@@ -8,13 +9,115 @@ from .isa import encode, decode
 from .memory import RamMemory
 
 
+class ClockBarrier(object):
+    """
+    Barrera que sincroniza los relojes de los núcleos. Funciona como ``threading.Barrier`` pero un participante que ya
+    terminó puede abandonarla con ``leave()`` en vez de seguir esperando en ella cada ciclo.
+
+    Un participante que se va a quedar detenido varios ciclos (p.e. la penalidad de un fallo de caché) puede esperarlos
+    todos con un solo ``wait(ciclos)``: queda contado como llegado en cada uno de esos ciclos y solo se despierta al
+    terminar el último, en lugar de despertarse y volver a esperar una vez por ciclo.
+    """
+
+    def __init__(self, parties: int):
+        assert parties > 0
+        self.parties = parties
+        self.n_waiting = 0
+        self._generation = 0
+        self._ahead = {}
+        """Participantes que ya cuentan como llegados en generaciones futuras, por generación"""
+        self._sleepers = []
+        """Participantes bloqueados en ``wait``: (generación en la que despiertan, lock que los bloquea)"""
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Cantidad de ciclos que ha completado la barrera"""
+        return self._generation
+
+    def wait(self, cycles: int = 1):
+        """
+        Espera hasta que todos los participantes lleguen a la barrera, tantas veces como ciclos se indiquen
+
+        :param cycles:  Cantidad de ciclos que espera
+        :return:
+        """
+        assert cycles >= 1
+        with self._lock:
+            generation = self._generation
+            target = generation + cycles
+
+            for g in range(generation + 1, target):
+                self._ahead[g] = self._ahead.get(g, 0) + 1
+
+            self.n_waiting += 1
+
+            if self.n_waiting >= self.parties:
+                self._release()
+
+            if self._generation >= target:
+                return
+
+            sleeper = threading.Lock()
+            sleeper.acquire()
+            self._sleepers.append((target, sleeper))
+
+        # Bloquea hasta que _release() libere el lock
+        sleeper.acquire()
+
+    def leave(self) -> int:
+        """
+        Sale de la barrera, los demás participantes ya no esperan por quien la abandona
+
+        :return:    Cantidad de participantes que quedan
+        """
+        with self._lock:
+            self.parties -= 1
+
+            if 0 < self.parties <= self.n_waiting:
+                self._release()
+
+            return self.parties
+
+    def _release(self):
+        # Avanza de generación, y sigue avanzando mientras todos los participantes ya hayan llegado a la siguiente
+        while True:
+            self._generation += 1
+            self.n_waiting = self._ahead.pop(self._generation, 0)
+            if not 0 < self.parties <= self.n_waiting:
+                break
+
+        generation = self._generation
+        sleepers = []
+        for target, sleeper in self._sleepers:
+            if target <= generation:
+                sleeper.release()
+            else:
+                sleepers.append((target, sleeper))
+        self._sleepers = sleepers
+
+
 class GlobalVars(object):
 
     def __init__(self, num_cpus: int):
-        self.clock_barrier = threading.Barrier(parties=num_cpus)
+        self.clock_barrier = ClockBarrier(parties=num_cpus)
         self.scheduler = Scheduler()
 
-        self.done = False
+        self.done_event = threading.Event()
+
+
+def drain_queue(q: deque) -> list:
+    """
+    Saca todos los elementos de una cola
+
+    :param q:   La cola
+    :return:    Lista con los elementos en el orden en que estaban en la cola
+    """
+    items = []
+    while q:
+        items.append(q.popleft())
+
+    return items
 
 
 def cargar_hilos(files: List[str], scheduler: Scheduler, inst_mem: RamMemory, start_addr: int):
@@ -37,22 +140,24 @@ def cargar_hilos(files: List[str], scheduler: Scheduler, inst_mem: RamMemory, st
 
 
 def read_hilo(filename: str):
+    """
+    Lee un hilillo de un archivo de texto (una instrucción por línea con sus 4 campos) y lo codifica
 
-    instructions = []
-    with open(filename, 'r') as file:
-
-        for line in file:
-            ins = [int(num) for num in line.split()]
-            assert len(ins) == 4
+    :param filename:    Ruta del archivo
+    :return:            Lista con las instrucciones codificadas
+    """
 
-            opcode, arg1, arg2, arg3 = ins
-            encoded_ins = encode(opcode, arg1, arg2, arg3)
-            assert ins == [v for v in decode(encoded_ins)]
+    with open(filename, 'r') as file:
+        rows = [[int(num) for num in line.split()] for line in file]
 
-            logging.debug('Instrucción: {:<20s} codificada: 0x{:08X}'.format(str(ins), encoded_ins))
+    # Cada línea debe tener sus 4 campos, encode() valida el rango de cada uno
+    assert all(len(row) == 4 for row in rows)
+    instructions = [encode(opcode, arg1, arg2, arg3) for opcode, arg1, arg2, arg3 in rows]
 
-            instructions.append(encoded_ins)
+    # Comprobación de ida y vuelta de la codificación, junto con el listado de depuración
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        assert rows == [list(decode(encoded_ins)) for encoded_ins in instructions]
+        for row, encoded_ins in zip(rows, instructions):
+            logging.debug('Instrucción: %-20s codificada: 0x%08X', str(row), encoded_ins)
 
     return instructions
-
-
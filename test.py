@@ -2,14 +2,17 @@
 
 import threading
 import logging
-import time
 from riscv import core, util, memory, hilo
 
 
 
 def setup_modules(global_vars):
-    mem_data = memory.RamMemory('Memoria de datos', start_addr=0, end_addr=384, num_blocks=24, bpp=4, ppb=4)
-    mem_inst = memory.RamMemory('Memoria de instrucciones', start_addr=384, end_addr=1024, num_blocks=40, bpp=4, ppb=4)
+    # Ambas memorias comparten un solo buffer de 256 palabras (direcciones 0 a 1024)
+    arena = memory.make_arena(256)
+    mem_data = memory.RamMemory('Memoria de datos', start_addr=0, end_addr=384, num_blocks=24, bpp=4, ppb=4,
+                                words=arena[0:96])
+    mem_inst = memory.RamMemory('Memoria de instrucciones', start_addr=384, end_addr=1024, num_blocks=40, bpp=4, ppb=4,
+                                words=arena[96:256])
     core0 = core.Core('CPU0', global_vars)
     cache_inst0 = memory.CacheMemAssoc('Inst$0', start_addr=384, end_addr=1024, assoc=1, num_blocks=8, bpp=4, ppb=4)
     cache_data0 = memory.CacheMemAssoc('Data$0', start_addr=0, end_addr=384, assoc=4, num_blocks=8, bpp=4, ppb=4)
@@ -44,17 +47,17 @@ def prueba_hilo20():
     datos = hilo.read_hilo('../hilos/20.txt')
 
     mem_inst.load(384, datos)
-    core0.pc.data = 384
-    logging.info(str(mem_inst))
+    core0.pc = 384
+    logging.info(mem_inst)
 
     logging.info('Iniciando simulación single Core')
-    logging.info(str(core0))
+    logging.info(core0)
 
     for i in range(17):
         core0.step()
 
     logging.info('Fin simulación single Core')
-    logging.info(str(core0))
+    logging.info(core0)
 
 
 def prueba_hilo12():
@@ -68,19 +71,19 @@ def prueba_hilo12():
     datos = hilo.read_hilo('../hilos/13.txt')
 
     mem_inst.load(384, datos)
-    core0.pc.data = 384
-    logging.info(str(mem_inst))
+    core0.pc = 384
+    logging.info(mem_inst)
 
     logging.info('Iniciando simulación single Core')
-    logging.info(str(core0))
+    logging.info(core0)
 
     while core0.state == core.Core.RUN:
         core0.step()
 
     logging.info('Fin simulación single Core')
-    logging.info(str(core0))
-    logging.info(str(cache_data0))
-    logging.info(str(mem_data))
+    logging.info(core0)
+    logging.info(cache_data0)
+    logging.info(mem_data)
 
 def prueba_varios_hilos():
 
@@ -106,8 +109,7 @@ def prueba_varios_hilos():
 
     logging.info('Finalizando simulación a continuación se presenta el estado final\n\n\n')
 
-    for i in range(len(programs)):
-        pcb = global_vars.scheduler.finished_queue.get_nowait()
+    for pcb in util.drain_queue(global_vars.scheduler.finished_queue):
         logging.info(pcb)
 
     logging.info(core0)
@@ -128,7 +130,7 @@ def prueba_multicore_lrsc():
                 './hilos_adv/5.txt',
                 './hilos_adv/6.txt']
 
-    global_vars = util.GlobalVars(3)
+    global_vars = util.GlobalVars(2)
     core0, cache_inst0, cache_data0, core1, cache_inst1, cache_data1, mem_inst, bus_inst, mem_data, bus_data = setup_modules(global_vars)
     mem_inst.data_format = 'default'
 
@@ -142,31 +144,17 @@ def prueba_multicore_lrsc():
     t_cpu0.start()
     t_cpu1.start()
 
-    logging.info('Thread {} spawned children'.format(threading.current_thread().getName()))
-
-    while not global_vars.done:
-        while global_vars.clock_barrier.n_waiting < 2:
-            time.sleep(0.001)
+    logging.info('Thread %s spawned children', threading.current_thread().name)
 
-        # logging.debug("Ambos hilos llegaron a clock")
-
-        for c in [core0, core1]:
-            if c.state == core.Core.IDL:
-                logging.debug('{:s} ya terminó'.format(c.name))
-
-        if core0.state == core.Core.IDL and core1.state == core.Core.IDL:
-            logging.info('Ambos Cores terminaron, finalizando simulación')
-            global_vars.done = True
-
-        global_vars.clock_barrier.wait()
+    # El último core en terminar marca el fin de la simulación
+    global_vars.done_event.wait()
 
     t_cpu0.join()
     t_cpu1.join()
 
     logging.info('Finalizando simulación a continuación se presenta el estado final\n\n\n')
 
-    for i in range(len(programs)):
-        pcb = global_vars.scheduler.finished_queue.get_nowait()
+    for pcb in util.drain_queue(global_vars.scheduler.finished_queue):
         logging.info(pcb)
 
     logging.info(core0)
@@ -189,7 +177,7 @@ def prueba_multicore():
                 './hilos/15.txt',
                 './hilos/16.txt']
 
-    global_vars = util.GlobalVars(3)
+    global_vars = util.GlobalVars(2)
     core0, cache_inst0, cache_data0, core1, cache_inst1, cache_data1, mem_inst, bus_inst, mem_data, bus_data = setup_modules(global_vars)
     mem_inst.data_format = 'default'
 
@@ -204,31 +192,17 @@ def prueba_multicore():
     t_cpu0.start()
     t_cpu1.start()
 
-    logging.info('Thread {} spawned children'.format(threading.current_thread().getName()))
-
-    while not global_vars.done:
-        while global_vars.clock_barrier.n_waiting < 2:
-            time.sleep(0.001)
+    logging.info('Thread %s spawned children', threading.current_thread().name)
 
-        # logging.debug("Ambos hilos llegaron a clock")
-
-        for c in [core0, core1]:
-            if c.state == core.Core.IDL:
-                logging.debug('{:s} ya terminó'.format(c.name))
-
-        if core0.state == core.Core.IDL and core1.state == core.Core.IDL:
-            logging.info('Ambos Cores terminaron, finalizando simulación')
-            global_vars.done = True
-
-        global_vars.clock_barrier.wait()
+    # El último core en terminar marca el fin de la simulación
+    global_vars.done_event.wait()
 
     t_cpu0.join()
     t_cpu1.join()
 
     logging.info('Finalizando simulación a continuación se presenta el estado final\n\n\n')
 
-    for i in range(len(programs)):
-        pcb = global_vars.scheduler.finished_queue.get_nowait()
+    for pcb in util.drain_queue(global_vars.scheduler.finished_queue):
         logging.info(pcb)
 
     logging.info(core0)
@@ -249,10 +223,10 @@ def main():
 
     core0, cache_inst0, cache_data0, core1, cache_inst1, cache_data1, mem_inst, bus_inst, mem_data, bus_data = setup_modules(global_vars)
 
-    # logging.info(str(cache_ins0))
+    # logging.info(cache_ins0)
 
     logging.info('Direcciones: [cpu0: {:s}, cpu1: {:s}, inst$0: {:s}, inst$1: {:s}, ins_mem: {:s}]'.format(hex(id(core0)), hex(id(core1)), hex(id(cache_inst0)), hex(id(cache_inst1)), hex(id(mem_inst))))
-    logging.info(str(bus_inst))
+    logging.info(bus_inst)
 
 
     # Spawn child Threads
@@ -262,14 +236,13 @@ def main():
     t_cpu0.start()
     #t_cpu1.start()
 
-    logging.info('Thread {} spawned children'.format(threading.current_thread().getName()))
-    time.sleep(1)
+    logging.info('Thread %s spawned children', threading.current_thread().name)
 
     t_cpu0.join()
     #t_cpu1.join()
 
-    time.sleep(1)
-    logging.info(str(mem_inst))
+    logging.info(mem_inst)
+    logging.shutdown()
 
 
 if __name__ == '__main__':